@@ -252,10 +252,22 @@ module bram_over_axi #(
     endcase
   end
 
+`ifdef VERILATOR
+  //Simulation-only bulk image dump for the cocotb helpers: write the directory into
+  //sim_image_path, then bump sim_dump_req. Every block writes <dir>/c<block>.hex
+  //(same layout as the firmware chunks) in a single call. Loads stay on the write
+  //process below, so mem_blk keeps a single driver.
+  logic        [8*256-1:0] sim_image_path = '0;
+  int unsigned             sim_dump_req = 0;
+`endif
+
   genvar i;
   generate
     for (i = 0; i < NUMBER_OF_BLOCKS; i++) begin : generate_blocks
       logic [BLOCK_SIZE-1:0] mem_blk[ENTRIES_PER_BLOCK];
+`ifdef VERILATOR
+      always @(sim_dump_req) $writememh($sformatf("%s/c%0d.hex", string'(sim_image_path), i), mem_blk);
+`endif
       if (DO_INIT) begin
         initial begin
           $display("Reading block: %s", $sformatf("firmware/build/c%0d.chunk", i));
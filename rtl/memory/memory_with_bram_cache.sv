@@ -159,7 +159,7 @@ module memory_with_bram_cache #(
   line_meta_t                                      writing_meta;
 
   generate
-    for (genvar i = 0; i < WORDS_PER_LINE; i++) begin
+    for (genvar i = 0; i < WORDS_PER_LINE; i++) begin : line_words
       (* RAM_STYLE = "block" *) logic [DATA_W - 1 : 0] line_block[CACHE_LINES];
       always_ff @(posedge clk) begin
         raw_read_line[i] <= line_block[cache_read_index];
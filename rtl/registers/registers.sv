@@ -28,6 +28,13 @@ module registers (
 
   assign full_table = '{x_regs: register_storage, pc: pc_storage};
 
+`ifdef VERILATOR
+  //Sim-only packed mirror so the testbench can read the whole register file
+  //with one VPI access: x[i] lives at bits [64*i +: 64]
+  logic [32*64-1:0] sim_x_regs_packed;
+  always_comb for (int i = 0; i < 32; i++) sim_x_regs_packed[64*i+:64] = register_storage[i];
+`endif
+
   always_ff @(posedge clk) begin : reg_loop
     if (rst) begin
       register_storage <= '{default: '0};
@@ -0,0 +1,87 @@
+import json
+import os
+import time
+import cocotb
+from tests.CPU.test_helpers import *
+
+# Simulator throughput: simulated cycles per wall-second of the model under
+# test, for picking a Verilator --threads count (see run_bench.py).
+#   RISCV_BENCH_MODE=long   one long loop of loads, ALU ops and stores
+#   RISCV_BENCH_MODE=short  many short programs, like a fuzz campaign
+#   RISCV_BENCH_ELF=<path>  long mode runs this firmware ELF instead
+# Only the time spent in run_until_complete is measured, so program
+# assembly and loading do not count. The result is logged and, with
+# RISCV_BENCH_OUT set, appended there as a JSON line.
+
+BENCH_MODE = os.environ.get("RISCV_BENCH_MODE", "long")
+BENCH_ITERS = int(os.environ.get("RISCV_BENCH_ITERS", "20000"))
+BENCH_PROGRAMS = int(os.environ.get("RISCV_BENCH_PROGRAMS", "200"))
+BENCH_ELF = os.environ.get("RISCV_BENCH_ELF")
+
+def long_loop_asm(iters):
+    """~8 instructions per iteration over a 1 KiB buffer at 0x800 (D-cache hits and evictions)."""
+    return f"""
+    li   x1, {iters}
+    li   x6, 0x800
+    li   x7, 0
+Loop:
+    slli x4, x1, 3
+    andi x4, x4, 0x3f8
+    add  x4, x4, x6
+    ld   x3, 0(x4)
+    add  x3, x3, x1
+    sd   x3, 0(x4)
+    xor  x7, x7, x3
+    addi x1, x1, -1
+    bne  x1, x0, Loop
+    ecall
+    """
+
+def short_program_asm(k):
+    """A fuzz-sized program: a few dozen dependent ALU ops and one store/load pair."""
+    body = "\n".join(f"    addi x{5 + i % 8}, x{5 + (i + 3) % 8}, {(k + i) % 97}" for i in range(40))
+    return f"""
+    li   x6, 0x800
+{body}
+    sd   x5, 0(x6)
+    ld   x4, 0(x6)
+    ecall
+    """
+
+async def _timed_run(harness, max_cycles):
+    t0 = time.perf_counter()
+    cycles = await harness.run_until_complete(max_cycles)
+    return cycles, time.perf_counter() - t0
+
+@cocotb.test()
+async def test_throughput(dut):
+    harness = Harness(dut)
+    total_cycles, wall, programs = 0, 0.0, 0
+    if BENCH_MODE == "short":
+        compiled = [assemble_rv32i(short_program_asm(k)).raw for k in range(8)]
+        for n in range(BENCH_PROGRAMS):
+            raw = compiled[n % len(compiled)]
+            await harness.hold_reset()
+            loadCompiledToMemory(raw, dut, diff=True)
+            cycles, dt = await _timed_run(harness, cycleBudget(len(raw) // 4))
+            markMemoryDirty(dut, 0x800, 8)   # the only store
+            total_cycles, wall, programs = total_cycles + cycles, wall + dt, programs + 1
+    else:
+        await harness.hold_reset()
+        if BENCH_ELF:
+            loadElfToMemory(dut, BENCH_ELF)
+            budget = 100_000_000
+        else:
+            loadAsmToMemory(long_loop_asm(BENCH_ITERS), dut)
+            budget = cycleBudget(10 * BENCH_ITERS)
+        total_cycles, wall = await _timed_run(harness, budget)
+        programs = 1
+
+    rate = total_cycles / wall if wall else 0.0
+    result = {"mode": BENCH_MODE, "programs": programs, "cycles": total_cycles,
+              "wall_s": round(wall, 3), "cycles_per_s": round(rate)}
+    dut._log.info(f"throughput: {total_cycles} cycles in {wall:.2f}s = {rate:,.0f} cycles/s ({BENCH_MODE})")
+    out = os.environ.get("RISCV_BENCH_OUT")
+    if out:
+        with open(out, "a") as f:
+            f.write(json.dumps(result) + "\n")
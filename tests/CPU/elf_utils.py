@@ -0,0 +1,257 @@
+import struct
+from collections import namedtuple
+
+# Minimal ELF64 little-endian reader: just enough to pull loadable bytes and
+# symbols out of what the RISC-V binutils produce for our tests.
+
+SHT_PROGBITS = 1
+SHT_SYMTAB   = 2
+SHT_RELA     = 4
+SHT_NOBITS   = 8
+SHF_ALLOC     = 0x2
+SHF_EXECINSTR = 0x4
+SHN_ABS      = 0xFFF1
+PT_LOAD      = 1
+
+Section = namedtuple("Section", "name type flags addr offset size link info entsize align")
+Symbol  = namedtuple("Symbol", "name value size info shndx")
+Rela    = namedtuple("Rela", "offset sym type addend")
+Segment = namedtuple("Segment", "type flags offset vaddr paddr filesz memsz align")
+
+# assembler-local labels and $x/$d mapping symbols; never part of a program's symbols
+LOCAL_PREFIXES = (".L", "$")
+
+def _is_label(sym):
+    # drops section/file symbols (no name), .L locals, $x mapping symbols and undefined refs
+    return bool(sym.name) and not sym.name.startswith(LOCAL_PREFIXES) and sym.shndx != 0
+
+class ElfFile:
+    def __init__(self, data: bytes):
+        if data[:4] != b"\x7fELF":
+            raise ValueError("Not an ELF file")
+        if data[4] != 2 or data[5] != 1:
+            raise ValueError("Only ELF64 little-endian is supported")
+        self.data = data
+        (self.e_type, self.e_machine, _, self.e_entry, self.e_phoff, self.e_shoff,
+         _, _, self.e_phentsize, self.e_phnum, self.e_shentsize, self.e_shnum,
+         self.e_shstrndx) = struct.unpack_from("<HHIQQQIHHHHHH", data, 16)
+
+        raw = [struct.unpack_from("<IIQQQQIIQQ", data, self.e_shoff + i * self.e_shentsize)
+               for i in range(self.e_shnum)]
+        strtab = raw[self.e_shstrndx] if self.e_shnum else None
+        self.sections = []
+        for name_off, typ, flags, addr, offset, size, link, info, align, entsize in raw:
+            name = self._cstr(strtab[4] + name_off) if strtab else ""
+            self.sections.append(Section(name, typ, flags, addr, offset, size, link, info, entsize, align))
+
+    def segments(self):
+        """Program headers (linked executables only)."""
+        out = []
+        for i in range(self.e_phnum):
+            typ, flags, offset, vaddr, paddr, filesz, memsz, align = struct.unpack_from(
+                "<IIQQQQQQ", self.data, self.e_phoff + i * self.e_phentsize)
+            out.append(Segment(typ, flags, offset, vaddr, paddr, filesz, memsz, align))
+        return out
+
+    def load_image(self, base: int = 0) -> bytes:
+        """
+        Memory contents from `base` up to the end of the last PT_LOAD segment,
+        each segment at its physical address: file bytes, then zeros up to
+        memsz (.bss). Gaps are zero-filled.
+        """
+        segs = [s for s in self.segments() if s.type == PT_LOAD and s.memsz]
+        if not segs:
+            return b""
+        lowest = min(s.paddr for s in segs)
+        if lowest < base:
+            raise ValueError(f"Segment at 0x{lowest:x} is below load base 0x{base:x}")
+        out = bytearray(max(s.paddr + s.memsz for s in segs) - base)
+        for s in segs:
+            start = s.paddr - base
+            out[start:start + s.filesz] = self.data[s.offset:s.offset + s.filesz]
+        return bytes(out)
+
+    def _cstr(self, off):
+        end = self.data.index(b"\0", off)
+        return self.data[off:end].decode()
+
+    def section(self, name):
+        for s in self.sections:
+            if s.name == name:
+                return s
+        return None
+
+    def section_bytes(self, sec) -> bytes:
+        if sec.type == SHT_NOBITS:
+            return bytes(sec.size)
+        return self.data[sec.offset:sec.offset + sec.size]
+
+    def symbols(self):
+        """All entries of .symtab (index 0 included so relocation indices line up)."""
+        symtab = next((s for s in self.sections if s.type == SHT_SYMTAB), None)
+        if symtab is None:
+            return []
+        strtab = self.sections[symtab.link]
+        out = []
+        for i in range(symtab.size // symtab.entsize):
+            name_off, info, _other, shndx, value, size = struct.unpack_from(
+                "<IBBHQQ", self.data, symtab.offset + i * symtab.entsize)
+            out.append(Symbol(self._cstr(strtab.offset + name_off), value, size, info, shndx))
+        return out
+
+    def relocations(self, sec_index):
+        """Rela entries that patch section `sec_index` (relocatable objects only)."""
+        out = []
+        for s in self.sections:
+            if s.type != SHT_RELA or s.info != sec_index:
+                continue
+            for i in range(s.size // s.entsize):
+                offset, info, addend = struct.unpack_from("<QQq", self.data, s.offset + i * s.entsize)
+                out.append(Rela(offset, info >> 32, info & 0xFFFFFFFF, addend))
+        return out
+
+    def symbol_table(self):
+        """name -> address for named symbols, skipping assembler-local (.L*) labels."""
+        table = {}
+        for sym in self.symbols():
+            if _is_label(sym):
+                table[sym.name] = sym.value
+        return table
+
+    def flat_image(self) -> bytes:
+        """
+        Same bytes `objcopy -O binary` would write: every allocated PROGBITS
+        section placed at (addr - lowest addr), gaps zero-filled.
+        """
+        secs = [s for s in self.sections
+                if s.flags & SHF_ALLOC and s.type == SHT_PROGBITS and s.size]
+        if not secs:
+            return b""
+        base = min(s.addr for s in secs)
+        end = max(s.addr + s.size for s in secs)
+        out = bytearray(end - base)
+        for s in secs:
+            out[s.addr - base:s.addr - base + s.size] = self.section_bytes(s)
+        return bytes(out)
+
+
+# ---------- in-process static link (RISC-V) ----------
+R_RISCV_32            = 1
+R_RISCV_64            = 2
+R_RISCV_BRANCH        = 16
+R_RISCV_JAL           = 17
+R_RISCV_PCREL_HI20    = 23
+R_RISCV_PCREL_LO12_I  = 24
+R_RISCV_PCREL_LO12_S  = 25
+R_RISCV_HI20          = 26
+R_RISCV_LO12_I        = 27
+R_RISCV_LO12_S        = 28
+R_RISCV_RELAX         = 51
+
+class UnsupportedLink(ValueError):
+    """The object needs something link_flat does not do; use the real linker."""
+
+def _hi20(v):
+    return ((v + 0x800) >> 12) & 0xFFFFF
+
+def _lo12(v):
+    return (v - (((v + 0x800) >> 12) << 12)) & 0xFFF
+
+def _patch(image, off, mask, bits):
+    word = int.from_bytes(image[off:off + 4], "little")
+    image[off:off + 4] = ((word & ~mask & 0xFFFFFFFF) | (bits & mask)).to_bytes(4, "little")
+
+def _patch_i(image, off, lo):
+    _patch(image, off, 0xFFF00000, lo << 20)
+
+def _patch_s(image, off, lo):
+    _patch(image, off, 0xFE000F80, ((lo >> 5) << 25) | ((lo & 0x1F) << 7))
+
+def _check_range(what, v, bits):
+    if v & 1 or not -(1 << (bits - 1)) <= v < (1 << (bits - 1)):
+        raise UnsupportedLink(f"{what} offset {v} out of range")
+
+def link_flat(elf: ElfFile, base: int = 0):
+    """
+    Stand-in for `ld -Ttext=<base>` + `objcopy -O binary` on one RISC-V
+    relocatable object: executable sections are laid out in file order (as
+    ld does for .text/.text.*) and branch, jal, %pcrel_hi/lo, %hi/%lo and
+    .word/.dword relocations are applied. Returns (image, symbols) with
+    symbols as name -> absolute address. Anything else (data sections,
+    undefined symbols, linker relaxation) raises UnsupportedLink.
+    """
+    addrs = {}
+    pc = base
+    for idx, sec in enumerate(elf.sections):
+        if not sec.flags & SHF_ALLOC:
+            continue
+        if not sec.flags & SHF_EXECINSTR or sec.type != SHT_PROGBITS:
+            if sec.size:
+                raise UnsupportedLink(f"non-text section {sec.name}")
+            continue
+        align = max(sec.align, 1)
+        pc = (pc + align - 1) // align * align
+        addrs[idx] = pc
+        pc += sec.size
+    image = bytearray(pc - base)
+    for idx, a in addrs.items():
+        sec = elf.sections[idx]
+        image[a - base:a - base + sec.size] = elf.section_bytes(sec)
+
+    syms = elf.symbols()
+    def sym_addr(sym):
+        if sym.shndx == SHN_ABS:
+            return sym.value
+        if sym.shndx in addrs:
+            return addrs[sym.shndx] + sym.value
+        raise UnsupportedLink(f"symbol {sym.name!r} is undefined or outside text")
+
+    hi_at = {}   # auipc address -> S + A - P, consumed by its %pcrel_lo partners
+    lo_relocs = []
+    for idx, a in addrs.items():
+        for r in elf.relocations(idx):
+            p = a + r.offset
+            off = p - base
+            if r.type == R_RISCV_RELAX:
+                continue
+            if r.type in (R_RISCV_PCREL_LO12_I, R_RISCV_PCREL_LO12_S):
+                lo_relocs.append((off, r))
+                continue
+            v = sym_addr(syms[r.sym]) + r.addend
+            if r.type == R_RISCV_BRANCH:
+                d = v - p
+                _check_range("branch", d, 13)
+                _patch(image, off, 0xFE000F80, (((d >> 12) & 1) << 31) | (((d >> 5) & 0x3F) << 25)
+                       | (((d >> 1) & 0xF) << 8) | (((d >> 11) & 1) << 7))
+            elif r.type == R_RISCV_JAL:
+                d = v - p
+                _check_range("jal", d, 21)
+                _patch(image, off, 0xFFFFF000, (((d >> 20) & 1) << 31) | (((d >> 1) & 0x3FF) << 21)
+                       | (((d >> 11) & 1) << 20) | (((d >> 12) & 0xFF) << 12))
+            elif r.type == R_RISCV_PCREL_HI20:
+                hi_at[p] = v - p
+                _patch(image, off, 0xFFFFF000, _hi20(v - p) << 12)
+            elif r.type == R_RISCV_HI20:
+                _patch(image, off, 0xFFFFF000, _hi20(v) << 12)
+            elif r.type == R_RISCV_LO12_I:
+                _patch_i(image, off, _lo12(v))
+            elif r.type == R_RISCV_LO12_S:
+                _patch_s(image, off, _lo12(v))
+            elif r.type == R_RISCV_32:
+                image[off:off + 4] = (v & 0xFFFFFFFF).to_bytes(4, "little")
+            elif r.type == R_RISCV_64:
+                image[off:off + 8] = (v & (2**64 - 1)).to_bytes(8, "little")
+            else:
+                raise UnsupportedLink(f"relocation type {r.type}")
+
+    # %pcrel_lo(label) names the auipc, whose offset is only known now
+    for off, r in lo_relocs:
+        anchor = sym_addr(syms[r.sym]) + r.addend
+        if anchor not in hi_at:
+            raise UnsupportedLink(f"%pcrel_lo without matching %pcrel_hi at 0x{anchor:x}")
+        lo = _lo12(hi_at[anchor])
+        (_patch_i if r.type == R_RISCV_PCREL_LO12_I else _patch_s)(image, off, lo)
+
+    symbols = {sym.name: sym_addr(sym) for sym in syms
+               if _is_label(sym) and (sym.shndx == SHN_ABS or sym.shndx in addrs)}
+    return bytes(image), symbols
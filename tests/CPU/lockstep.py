@@ -0,0 +1,146 @@
+import os
+from collections import deque, namedtuple
+import cocotb
+from cocotb.triggers import RisingEdge, ReadOnly, Event
+from tests.CPU.riscv_disasm import decode, disassemble_word
+from tests.CPU.riscv_iss import Iss, IssError, decode_op
+
+# Commit-log checker: follows tp_lvl's retirement every cycle and replays the
+# same program on riscv_iss.Iss in lockstep, flagging the first instruction
+# whose architectural effect differs.
+#
+# Two in-order streams are compared, each against the ISS's expectations of
+# that kind:
+#   "wb" - every non-store instruction reaches writeback once with its
+#          register write (or none: branches, fence, ecall, rd = x0)
+#   "st" - stores complete in the memory stage, when the write handshake for
+#          the request computed from execute's outputs is accepted
+# The DUT does not carry the PC past decode, so the PC in a report is the
+# ISS's PC for the mismatching commit, which is the retiring PC of an
+# in-order pipeline.
+
+LOCKSTEP_ENABLED = os.environ.get("RISCV_LOCKSTEP", "0") != "0"
+
+# load_store_variant_e encodings of the store widths (instruction_decode_types.sv)
+_STORE_BYTES = {0: 1, 1: 2, 2: 4, 6: 8}
+_WRITES_RD = {"R", "I", "SH6", "SH5", "L", "J", "U"}
+
+Commit = namedtuple("Commit", "kind pc word rd value addr data")
+
+def iss_commit(iss: Iss) -> Commit:
+    """Step `iss` once and describe what the instruction did to architectural state."""
+    pc = iss.pc
+    word = iss.fetch()
+    _fn, rd, rs1, _rs2, imm = decode_op(word)
+    fmt = decode(word)[1]
+    addr = (iss.x[rs1] + imm) & ((1 << 64) - 1) if fmt == "S" else None
+    iss.step()
+    if fmt == "S":
+        n = 1 << ((word >> 12) & 3)
+        return Commit("st", pc, word, None, None, addr, bytes(iss.memory[addr:addr + n]))
+    if fmt in _WRITES_RD and rd:
+        return Commit("wb", pc, word, rd, iss.x[rd], None, None)
+    return Commit("wb", pc, word, None, None, None, None)
+
+class LockstepChecker:
+    """
+    checker = LockstepChecker(dut, image).start() once the clock runs; await
+    checker.diverged.wait() alongside completion; checker.check() afterwards
+    stops the monitor and raises AssertionError with the first divergence.
+    """
+    def __init__(self, dut, image: bytes, mem_size=4096, symbols=None):
+        self.dut = dut
+        self.iss = Iss(image, mem_size)
+        self.symbols = symbols
+        self.pending = {"wb": deque(), "st": deque()}
+        self.diverged = Event()
+        self.error = None
+        self.cycle = 0
+        self.retired = 0
+        self._task = None
+
+    def start(self):
+        self._task = cocotb.start_soon(self._monitor())
+        return self
+
+    def check(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        if self.error:
+            raise AssertionError(self.error)
+
+    def _expect(self, kind):
+        q = self.pending[kind]
+        while not q and not self.iss.halted:
+            c = iss_commit(self.iss)
+            self.pending[c.kind].append(c)
+        return q.popleft() if q else None
+
+    def _fail(self, exp, what):
+        where = "after the ISS halted" if exp is None else \
+            f"pc 0x{exp.pc:x}: {disassemble_word(exp.word, exp.pc)}"
+        self.error = (f"Lockstep divergence at cycle {self.cycle} "
+                      f"(commit #{self.retired + 1}), {where}: {what}")
+        self.dut._log.error(self.error)
+        self.diverged.set()
+
+    def _on_writeback(self, rd, value, writes):
+        try:
+            exp = self._expect("wb")
+        except IssError as e:
+            return self._fail(None, f"ISS stopped: {e}")
+        got = f"x{rd}=0x{value:x}" if writes and rd else "no register write"
+        if exp is None:
+            return self._fail(None, f"DUT retired another instruction ({got})")
+        want = f"x{exp.rd}=0x{exp.value:x}" if exp.rd else "no register write"
+        if got != want:
+            return self._fail(exp, f"expected {want}, DUT {got}")
+        self.retired += 1
+
+    def _on_store(self, addr, data):
+        try:
+            exp = self._expect("st")
+        except IssError as e:
+            return self._fail(None, f"ISS stopped: {e}")
+        got = f"[0x{addr:x}] <= {data.hex()}"
+        if exp is None:
+            return self._fail(None, f"DUT performed another store {got}")
+        want = f"[0x{exp.addr:x}] <= {exp.data.hex()}"
+        if got != want:
+            return self._fail(exp, f"expected store {want}, DUT {got}")
+        self.retired += 1
+
+    async def _monitor(self):
+        dut = self.dut
+        wb, mem = dut.writeback, dut.memory_stage
+        wb_valid, wb_write, wb_rd, wb_value, wb_end = (
+            wb.mem_result_valid, wb.write_to_rd, wb.rd, wb.register_value_to_write, wb.should_end_program)
+        st_mem, st_valid, st_write, st_accept, st_addr, st_data, st_variant = (
+            mem.ex_is_mem_addr_d, mem.ex_result_valid_d, mem.ex_mem_addr_is_write_d,
+            mem.accepting_alu_result, mem.ex_result_d, mem.ex_op_2_pt_d, mem.ex_load_store_variant_d)
+        stall = dut.memory_stage_stall_out
+
+        # Writeback re-presents the memory-stage instruction every cycle that
+        # execute is stalled, so commits are deduplicated by an id that
+        # advances whenever execute latches a new instruction.
+        mem_id, last_wb, stall_prev = 0, -1, True
+        while not self.diverged.is_set():
+            await RisingEdge(dut.clk)
+            await ReadOnly()
+            self.cycle += 1
+            wb_id = mem_id
+            if not stall_prev:
+                mem_id += 1
+            stall_prev = bool(int(stall.value))
+
+            if int(st_mem.value) and int(st_valid.value) and int(st_write.value) and int(st_accept.value):
+                n = _STORE_BYTES.get(int(st_variant.value), 8)
+                addr = int(st_addr.value)
+                data = (int(st_data.value) & ((1 << (8 * n)) - 1)).to_bytes(n, "little")
+                self._on_store(addr, data)
+
+            if int(wb_valid.value) and wb_id != last_wb:
+                last_wb = wb_id
+                self._on_writeback(int(wb_rd.value), int(wb_value.value), bool(int(wb_write.value)))
+                if int(wb_end.value):
+                    return
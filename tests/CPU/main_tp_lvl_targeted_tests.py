@@ -1,6 +1,4 @@
 import cocotb
-from cocotb.clock import Clock, Timer
-from cocotb.triggers import RisingEdge, ReadOnly, ReadWrite, First
 import sys, os
 sys.path.append(os.path.dirname(__file__))
 from tests.CPU.riscv_tests_gen import *
@@ -8,11 +6,9 @@ from tests.CPU.test_helpers import *
 
 @cocotb.test()
 async def nothing_test(dut):
-    clock = Clock(dut.clk, 1, unit="ns")
-    await resetAndPrepare(dut)
-    cocotb.start_soon(clock.start())
-    await Timer(10000, unit="ns")
-    clock.stop()
+    harness = Harness(dut)
+    await harness.hold_reset()
+    await harness.run_cycles(10000)
     
 @cocotb.test()
 async def test_single_add(dut):
@@ -25,15 +21,12 @@ async def test_single_add(dut):
     add   x3, x1, x2
     ecall
     """
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    loadRegisters([0, 1535, 8462, 5473, 9], dut)
-    clock = Clock(dut.clk, 1, unit="ns")
-    cocotb.start_soon(clock.start())
-    await First(RisingEdge(dut.program_complete), Timer(100, unit="ns"))
+    await harness.run_until_complete(100, registers=[0, 1535, 8462, 5473, 9])
     checkRegister(3, 1535 + 8462, dut)
     checkFinished(dut)
-    clock.stop()
 
 @cocotb.test()
 async def infinite_loop(dut):
@@ -44,12 +37,10 @@ async def infinite_loop(dut):
         jal x0, top
     ecall
     """
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    clock = Clock(dut.clk, 1, unit="ns")
-    cocotb.start_soon(clock.start())
-    await First(RisingEdge(dut.program_complete), Timer(100, unit="ns"))
-    clock.stop()
+    await harness.run_cycles(100)
 
 
 @cocotb.test()
@@ -59,11 +50,10 @@ async def test_single_sub(dut):
     sub   x3, x1, x2
     ecall
     """
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    loadRegisters([0, 1535, 8462, 5473, 9], dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(100, unit='ns'))
+    await harness.run_until_complete(100, registers=[0, 1535, 8462, 5473, 9])
     checkRegister(3, 1535 - 8462, dut, True)
     checkFinished(dut)
 
@@ -74,11 +64,10 @@ async def test_single_add_imm(dut):
     add x3, x1, 30
     ecall
     """
-    loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    loadRegisters([0, 1535, 8462, 5473, 9], dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await RisingEdge(dut.program_complete)
+    harness = Harness(dut)
+    await harness.hold_reset()
+    prog = loadAsmToMemory(asm, dut)
+    await harness.run_until_complete(cycleBudget(len(prog.raw) // 4), registers=[0, 1535, 8462, 5473, 9])
     checkRegister(3, 1535 + 30, dut, True)
 
 @cocotb.test()
@@ -88,11 +77,10 @@ async def test_single_shift_imm_logical(dut):
     srl x3, x1, 1
     ecall
     """
-    loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    loadRegisters([0, -10, 8462, 5473, 9], dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await RisingEdge(dut.program_complete)
+    harness = Harness(dut)
+    await harness.hold_reset()
+    prog = loadAsmToMemory(asm, dut)
+    await harness.run_until_complete(cycleBudget(len(prog.raw) // 4), registers=[0, -10, 8462, 5473, 9])
     checkRegister(3, 9223372036854775803, dut, True)
 
 @cocotb.test()
@@ -102,11 +90,10 @@ async def test_single_shift_imm_arithmetic(dut):
    srai x3, x1, 1
    ecall
    """
-    loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    loadRegisters([0, -10, 8462, 5473, 9], dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await RisingEdge(dut.program_complete)
+    harness = Harness(dut)
+    await harness.hold_reset()
+    prog = loadAsmToMemory(asm, dut)
+    await harness.run_until_complete(cycleBudget(len(prog.raw) // 4), registers=[0, -10, 8462, 5473, 9])
     checkRegister(3, -5, dut, True)
 
 @cocotb.test()
@@ -118,11 +105,10 @@ async def test_multiple_instruction_no_deps(dut):
     or x12, x3, x4
     ecall
     """
-    loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    loadRegisters([0, 745628, 48392, -10, 10], dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await RisingEdge(dut.program_complete)
+    harness = Harness(dut)
+    await harness.hold_reset()
+    prog = loadAsmToMemory(asm, dut)
+    await harness.run_until_complete(cycleBudget(len(prog.raw) // 4), registers=[0, 745628, 48392, -10, 10])
     checkRegister(10, 745628 + 48392, dut, True)
     checkRegister(11, 745628 - 10, dut, True)
     checkRegister(12, -2, dut, True)
@@ -140,11 +126,10 @@ async def test_multiple_instruction_far_deps(dut):
     add x11, x10, x10
     ecall
     """
-    loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    loadRegisters([0, 745628, 48392, -10, 10], dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await RisingEdge(dut.program_complete)
+    harness = Harness(dut)
+    await harness.hold_reset()
+    prog = loadAsmToMemory(asm, dut)
+    await harness.run_until_complete(cycleBudget(len(prog.raw) // 4), registers=[0, 745628, 48392, -10, 10])
     checkRegister(10, 745628 + 48392, dut, True)
     checkRegister(11, ( 745628 + 48392) * 2, dut, True)
 
@@ -161,11 +146,10 @@ async def test_multiple_instruction_close_deps(dut):
     add x14, x1, 0
     ecall
     """
-    loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    loadRegisters([0, 745628, 48392, -10, 10], dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await RisingEdge(dut.program_complete)
+    harness = Harness(dut)
+    await harness.hold_reset()
+    prog = loadAsmToMemory(asm, dut)
+    await harness.run_until_complete(cycleBudget(len(prog.raw) // 4), registers=[0, 745628, 48392, -10, 10])
     reg_10 = 745628 + 48392
     reg_11 = reg_10 + reg_10
     reg_12 = reg_11 + 35
@@ -189,10 +173,10 @@ async def test_big_immediate(dut):
     li x4, 0b1010101010101010101010101010101010101010101010101010101010101010
     ecall
     """
-    loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await RisingEdge(dut.program_complete)
+    harness = Harness(dut)
+    await harness.hold_reset()
+    prog = loadAsmToMemory(asm, dut)
+    await harness.run_until_complete(cycleBudget(len(prog.raw) // 4))
     checkRegister(3, 0x7FFFF000, dut, False)
     checkRegister(4, 0b1010101010101010101010101010101010101010101010101010101010101010, dut)
 @cocotb.test()
@@ -212,11 +196,10 @@ async def test_jump(dut):
     li x10, 12345
     jal x5, endo
     """
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    loadRegisters([0, 3, 4, 111, 111], dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(50, unit="ns"))
+    await harness.run_until_complete(50, registers=[0, 3, 4, 111, 111])
     checkRegister(3, 7, dut, False)
     checkRegister(4, 12, dut, False)
     checkRegister(10, 12345, dut)
@@ -240,10 +223,10 @@ async def test_auipc(dut):
     nop
     ecall
     """
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(50, unit="ns"))
+    await harness.run_until_complete(50)
     checkRegister(3, 6*4+0x101000, dut, True)
     checkFinished(dut)
 
@@ -268,10 +251,10 @@ async def test_jump_reg(dut):
     li x10, 12345
     jal x5, endo
     """
-    loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await RisingEdge(dut.program_complete)
+    harness = Harness(dut)
+    await harness.hold_reset()
+    prog = loadAsmToMemory(asm, dut)
+    await harness.run_until_complete(cycleBudget(len(prog.raw) // 4))
     checkRegister(10, 12345, dut, True)
     checkRegister(1, 8, dut, True)
     checkRegister(3, 5, dut)
@@ -338,10 +321,10 @@ AfterT5:
     ecall
     """
 
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(100, unit="ns"))
+    await harness.run_until_complete(100)
     checkFinished(dut)
 
     # Expected: x21=1 (taken), x22=1 (not taken), x23=1 (taken), x24=1 (taken), x25=1 (not taken)
@@ -410,10 +393,10 @@ L_bgeu_after:
 
     ecall
     """
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(100, unit="ns"))
+    await harness.run_until_complete(100)
 
     checkRegister(21, 1, dut, True)  # BNE not taken
     checkRegister(22, 1, dut, True)  # BLT taken
@@ -441,10 +424,10 @@ LoopStart:
     # x12 == 10 (sum 4+3+2+1)
     ecall
     """
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(100, unit="ns"))
+    await harness.run_until_complete(100)
 
     checkRegister(10, -1, dut, True)  # ended at -1
     checkRegister(11, 5,  dut, True)  # 5 iterations
@@ -530,10 +513,10 @@ H5_UNSIGNED_DONE:
 
     ecall
     """
-    loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await RisingEdge(dut.program_complete)
+    harness = Harness(dut)
+    await harness.hold_reset()
+    prog = loadAsmToMemory(asm, dut)
+    await harness.run_until_complete(cycleBudget(len(prog.raw) // 4))
 
     # Hazard 1
     checkRegister(20, 1, dut, True)
@@ -589,10 +572,10 @@ LOOP:
     # Expect x22 = 3 (ran for 3 iterations)
     ecall
     """
-    loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await RisingEdge(dut.program_complete)
+    harness = Harness(dut)
+    await harness.hold_reset()
+    prog = loadAsmToMemory(asm, dut)
+    await harness.run_until_complete(cycleBudget(len(prog.raw) // 4))
 
     checkRegister(20, 1, dut, True)  # PASS1
     checkRegister(21, 1, dut, True)  # PASS2
@@ -613,10 +596,10 @@ target:
         addi  x7, x7, 3                   # executes exactly once
         ecall
     """
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(500, unit="ns"))
+    await harness.run_until_complete(500)
     checkFinished(dut)
     checkRegister(6, 1, dut, True)
     checkRegister(7, 3, dut, True)
@@ -639,10 +622,10 @@ target:
         addi  x7, x7, 3               # executes exactly once
         ecall
     """
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(500, unit="ns"))
+    await harness.run_until_complete(500)
 
     checkFinished(dut)
     checkRegister(6, 1, dut, True)
@@ -655,10 +638,10 @@ async def test_ori(dut):
         ori x3, x1, 0b001
         ecall
     """
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(500, unit="ns"))
+    await harness.run_until_complete(500)
     checkFinished(dut)
     checkRegister(3, 0b101, dut, True)
 
@@ -673,10 +656,10 @@ async def test_addw(dut):
         addw x4, x1, x2
         ecall
     """
-    loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await RisingEdge(dut.program_complete)
+    harness = Harness(dut)
+    await harness.hold_reset()
+    prog = loadAsmToMemory(asm, dut)
+    await harness.run_until_complete(cycleBudget(len(prog.raw) // 4))
     checkRegister(1, 8761733283840, dut, True)
     checkRegister(2, 0b10000000000000000000000000000000, dut, True)
     checkRegister(3, 8763880767488, dut, True)
@@ -693,10 +676,10 @@ async def test_srli_64bit(dut):
         srli x5, x4, 1            # Shift MSB right by 1
         ecall
     """
-    loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await RisingEdge(dut.program_complete)
+    harness = Harness(dut)
+    await harness.hold_reset()
+    prog = loadAsmToMemory(asm, dut)
+    await harness.run_until_complete(cycleBudget(len(prog.raw) // 4))
     checkRegister(2, 0x0FFFFFFFFFFFFFFF, dut, False)  # Logical shift fills with 0s
     checkRegister(3, 0x0000000000000001, dut, False)  # Only LSB remains
     checkRegister(5, 0x4000000000000000, dut, False)  # MSB becomes 0
@@ -713,10 +696,10 @@ async def test_srliw_32bit_truncation(dut):
         srliw x6, x5, 31          # Shift all the way to get 0 (positive MSB)
         ecall
     """
-    loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await RisingEdge(dut.program_complete)
+    harness = Harness(dut)
+    await harness.hold_reset()
+    prog = loadAsmToMemory(asm, dut)
+    await harness.run_until_complete(cycleBudget(len(prog.raw) // 4))
     # SRLIW operates on lower 32 bits (0x12345678), shifts right by 4 -> 0x01234567
     # Then sign extends: 0x01234567 is positive, so result is 0x0000000001234567
     checkRegister(2, 0x01234567, dut, False)
@@ -740,10 +723,10 @@ async def test_srai_64bit_arithmetic(dut):
         srai x7, x6, 1            # Arithmetic shift right by 1
         ecall
     """
-    loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await RisingEdge(dut.program_complete)
+    harness = Harness(dut)
+    await harness.hold_reset()
+    prog = loadAsmToMemory(asm, dut)
+    await harness.run_until_complete(cycleBudget(len(prog.raw) // 4))
     # SRAI on negative number fills with 1s
     checkRegister(2, 0xFFFFFFFFFFFFFFFF, dut, False)  # Still all 1s
     checkRegister(3, 0xFFFFFFFFFFFFFFFF, dut, False)  # Still all 1s
@@ -766,10 +749,10 @@ async def test_sraiw_32bit_arithmetic_truncation(dut):
         sraiw x8, x7, 8           # Shift -1 right by 8 bits
         ecall
     """
-    loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await RisingEdge(dut.program_complete)
+    harness = Harness(dut)
+    await harness.hold_reset()
+    prog = loadAsmToMemory(asm, dut)
+    await harness.run_until_complete(cycleBudget(len(prog.raw) // 4))
     # SRAIW on 0x80000000 (most negative 32-bit) >> 4 = 0xF8000000, sign extended to 0xFFFFFFFFF8000000
     checkRegister(2, 0xFFFFFFFFF8000000, dut, False)
     # SRAIW on 0x80000000 >> 1 = 0xC0000000, sign extended to 0xFFFFFFFFC0000000
@@ -785,10 +768,10 @@ async def test_neg_one(dut):
         addi x13,x0,-1
         ecall
     """
-    loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await RisingEdge(dut.program_complete)
+    harness = Harness(dut)
+    await harness.hold_reset()
+    prog = loadAsmToMemory(asm, dut)
+    await harness.run_until_complete(cycleBudget(len(prog.raw) // 4))
 
     checkRegister(13, -1, dut, True)
 
@@ -807,10 +790,10 @@ TGT:
     li   x13, 1
     ecall
     """
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(50, unit="ns"))
+    await harness.run_until_complete(50)
     checkRegister(13, 1, dut, True)
     checkFinished(dut)
 
@@ -831,10 +814,10 @@ TGT:
     li   x13, 1
     ecall
     """
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(50, unit="ns"))
+    await harness.run_until_complete(50)
     checkRegister(13, 1, dut, True)
     checkFinished(dut)
 
@@ -882,10 +865,10 @@ nop
 
                                                                 ecall
     """
-    loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await RisingEdge(dut.program_complete)
+    harness = Harness(dut)
+    await harness.hold_reset()
+    prog = loadAsmToMemory(asm, dut)
+    await harness.run_until_complete(cycleBudget(len(prog.raw) // 4))
 
     checkRegister(13, 1, dut, True)
 
@@ -919,10 +902,10 @@ TGT_B:
     li   x13, 1
     ecall
     """
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(50, unit="ns"))
+    await harness.run_until_complete(50)
     checkRegister(13, 1, dut, True)   # final write should be 1
     checkRegister(30, 0, dut, False)  # sanity from filler ops
     checkFinished(dut)
@@ -934,10 +917,10 @@ async def test_slli_imm_32(dut):
     slli x5, x5, 32     # requires 6-bit shamt on RV64; wrong decode -> shifts by 0
     ecall
     """
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(50, unit="ns"))
+    await harness.run_until_complete(50)
     # Expect 0x0000000100000000
     checkRegister(5, 0x0000000100000000, dut, False)
     checkFinished(dut)
@@ -1000,10 +983,10 @@ async def test_li_64bit_constant_build(dut):
                                                         L_DONE_37_19:
                                                                 ecall
     """
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(500, unit="ns"))
+    await harness.run_until_complete(500)
     checkRegister(28, 0x66af0807d37d2cbb, dut, False)
     checkFinished(dut)
 
@@ -1015,15 +998,15 @@ async def test_load(dut):
     lw   x2, 1024(x0)
     ecall
     """
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
 
     # Put a 64-bit value at byte address 1024.
     # 0x0000...0FF1 ensures both LD and LW read the same low value.
     await awrite_u64(dut, 1024, 0x0000000000000FF1)
 
-    cocotb.start_soon(Clock(dut.clk, 1, units="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(50, units="ns"))
+    await harness.run_until_complete(50)
 
     checkRegister(1, 0x0000000000000FF1, dut, False)  # x1 from ld
     checkRegister(2, 0x0000000000000FF1, dut, False)  # x2 from lw (zero-extended)
@@ -1036,11 +1019,11 @@ async def test_use_after_load(dut):
     addi x1, x1, 50
     ecall
     """
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
     await awrite_u64(dut, 1024, 0x0000000000000FF1)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(50, unit="ns"))
+    await harness.run_until_complete(50)
     checkRegister(1, 0xFF1 + 50, dut, False)
     checkFinished(dut)
 
@@ -1055,11 +1038,11 @@ async def test_multi_load(dut):
 
     ecall
     """
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
     await awrite_u64(dut, 1024, 0x0000000000000FF1)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(50, unit="ns"))
+    await harness.run_until_complete(50)
     checkRegister(1, 0xFFFFFFFFFFFFFFF1, dut, False)
     checkRegister(2, 0xF1, dut, False)
     checkFinished(dut)
@@ -1101,17 +1084,17 @@ async def test_load_variants_rv64i(dut):
         ecall
     """
 
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
 
     # Little-endian pattern: 0xBEBA_CAFE_DEAD_BEEF laid out from BASE upward
     bytes_at_base = [0xEF, 0xBE, 0xAD, 0xDE, 0xFE, 0xCA, 0xBA, 0xBE]
     for i, b in enumerate(bytes_at_base):
         await awrite_u8(dut, BASE+i, b)
 
-    # Start clock & run
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(2000, unit="ns"))
+    # Run
+    await harness.run_until_complete(2000)
 
     # ---- Expected values (RV64I) ----
     # From offset 0:
@@ -1161,10 +1144,10 @@ async def test_store(dut):
 
     ecall
     """
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(500, unit="ns"))
+    await harness.run_until_complete(500)
     checkRegister(3,  12345, dut, False)
     checkFinished(dut)
 
@@ -1177,10 +1160,10 @@ async def test_store2(dut):
         lhu  x5, 2(x31)
     ecall
     """
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(50, unit="ns"))
+    await harness.run_until_complete(50)
     checkRegister(5,  0xBEEF, dut, False)
     checkFinished(dut)
 
@@ -1219,8 +1202,9 @@ async def test_edge_sign_zero_ext(dut):
         ecall
     """
 
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
 
     # Memory map (little-endian):
     # +0:  0x80  -> LB = -128, LBU = 0x80
@@ -1245,8 +1229,7 @@ async def test_edge_sign_zero_ext(dut):
     await awrite_u8(dut, BASE+14, 0xFF) 
     await awrite_u8(dut, BASE+15, 0xFF) 
 
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(200, unit="ns"))
+    await harness.run_until_complete(200)
 
     # Byte 0x80
     checkRegister(1,  0xFFFFFFFFFFFFFF80, dut, False)  # lb
@@ -1299,8 +1282,9 @@ async def test_aligned_mixed_loads(dut):
         ecall
     """
 
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
 
     for i in range(16):
         await awrite_u8(dut, BASE + i ,i)
@@ -1311,8 +1295,7 @@ async def test_aligned_mixed_loads(dut):
     # lw @+4  -> 0x07060504  (sign-extend; MSB=0x07 => positive)
     # lwu@+12 -> 0x0F0E0D0C
     # ld @+8  -> 0x0F0E0D0C0B0A0908
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(200, unit="ns"))
+    await harness.run_until_complete(200)
 
     checkRegister(1,  0x0000000000000302,     dut, False)  # lh
     checkRegister(2,  0x0000000000000F0E,     dut, False)  # lhu
@@ -1361,15 +1344,15 @@ async def test_store_then_load_width_mix(dut):
         ecall
     """
 
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
 
     # Initialize surrounding bytes (so mixed-width overlaps are deterministic)
     for i in range(0, 32):
         await awrite_u8(dut, BASE + i, 0x11)  # filler
 
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(200, unit="ns"))
+    await harness.run_until_complete(200)
 
     # After sb x2,0: byte at +0 = 0xEF
     checkRegister(3, 0xFFFFFFFFFFFFFFEF, dut, False)  # lb
@@ -1419,16 +1402,16 @@ async def test_load_then_store_dep_single_program(dut):
         ecall
     """
 
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
 
     # Place 0x1122334455667788 at BASE (little-endian)
     patt = [0x88,0x77,0x66,0x55,0x44,0x33,0x22,0x11]
     for i,b in enumerate(patt):
         await awrite_u8(dut, BASE + i, b)
 
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(200, unit="ns"))
+    await harness.run_until_complete(200)
 
     # Verify:
     # x1 = original LD
@@ -1471,16 +1454,16 @@ async def test_branch_flush_cancels_store(dut):
         ecall
     """
 
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
 
     # Original memory value to preserve if flush works:
     orig = [0xEF,0xBE,0xAD,0xDE,0xFE,0xCA,0xBA,0xBE]  # 0xBEBACAFEDEADBEEF
     for i,b in enumerate(orig):
         await awrite_u8(dut, BASE + i, b)
 
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(200, unit="ns"))
+    await harness.run_until_complete(200)
 
     checkRegister(7, 0xBEBACAFEDEADBEEF, dut, False)  # unchanged after flushed store
     checkFinished(dut)
@@ -1507,15 +1490,15 @@ async def test_branch_not_taken_store_commits(dut):
         ecall
     """
 
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
 
     # Initialize to something else
     for i,b in enumerate([0x00]*8):
         await awrite_u8(dut, BASE + i, b)
 
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(200, unit="ns"))
+    await harness.run_until_complete(200)
 
     checkRegister(7, 0x0123456789ABCDEF, dut, False)
     checkFinished(dut)
@@ -1551,14 +1534,14 @@ async def test_branch_depends_on_load(dut):
         ecall
     """
 
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
 
     # Set selector byte so that branch is NOT taken (x1 != 0)
     await awrite_u8(dut, BASE + 0, 0x01)
 
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(300, unit="ns"))
+    await harness.run_until_complete(300)
 
     # We expect the fall-through store (x2) to commit
     checkRegister(4, 0xAABBCCDDEEFF0011, dut, False)
@@ -1594,15 +1577,15 @@ async def test_load_after_store_with_branch_misdir(dut):
         ecall
     """
 
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
 
     # Initialize to something else before the store
     for i,b in enumerate([0x00]*8):
         await awrite_u8(dut, BASE + i, b)
 
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(200, unit="ns"))
+    await harness.run_until_complete(200)
 
     checkRegister(6, 0xFEEDFACECAFED00D, dut, False)
     checkFinished(dut)
@@ -1637,15 +1620,15 @@ async def test_sw_lbu_endianness_and_strobes(dut):
         ecall
     """
 
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
 
     # Pre-fill the 4 target bytes with a known nonzero pattern to catch missing strobes.
     for i, b in enumerate([0x11, 0x22, 0x33, 0x44]):
         await awrite_u8(dut, BASE + OFFS + i, b)
 
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(200, unit="ns"))
+    await harness.run_until_complete(200)
 
     # Verify per-byte results
     checkRegister(10, 0xEF, dut, False)
@@ -1683,15 +1666,15 @@ async def test_sw_pre_branch_not_taken(dut):
         ecall
     """
 
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
 
     # Pre-fill bytes so a missing store shows up clearly.
     for i, b in enumerate([0xAA, 0xBB, 0xCC, 0xDD]):
         await awrite_u8(dut, BASE + OFFS + i, b)
 
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(200, unit="ns"))
+    await harness.run_until_complete(200)
 
     checkRegister(10, 0xEF, dut, False)
     checkRegister(11, 0xBE, dut, False)
@@ -1742,15 +1725,15 @@ async def test_sb_lane_sweep(dut):
         ecall
     """
 
-    await resetAndPrepare(dut)
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
 
     # Pre-fill target bytes with a pattern to detect missed writes
     for i, b in enumerate([0xA0,0xB0,0xC0,0xD0,0xE0,0xF0,0xAB,0xCD]):
         await awrite_u8(dut, BASE + i, b)
 
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(200, unit="ns"))
+    await harness.run_until_complete(200)
 
     for reg, val in zip([10,11,12,13,14,15,16,17],[0x11,0x22,0x33,0x44,0x55,0x66,0x77,0x88]):
         checkRegister(reg, val, dut, False)
@@ -1769,7 +1752,7 @@ async def test_sw_across_beat_offsets(dut):
     BASE = 0x8C0  # 8-byte aligned
     PAT  = 0xA1B2C3D4  # LSB first in memory: D4 C3 B2 A1
 
-    await resetAndPrepare(dut)
+    harness = Harness(dut)
 
     for offs in range(0, 5):  # 0..4 (SW spans 4 bytes)
         asm = f"""
@@ -1783,6 +1766,7 @@ async def test_sw_across_beat_offsets(dut):
             lbu x13, {offs+3}(x31)
             ecall
         """
+        await harness.hold_reset()
         loadAsmToMemory(asm, dut)
 
         # Pre-fill the 8-byte beat so missing strobes show
@@ -1790,8 +1774,7 @@ async def test_sw_across_beat_offsets(dut):
         for i in range(8):
             await awrite_u8(dut, beat_base + i, 0x00)
 
-        cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-        await First(RisingEdge(dut.program_complete), Timer(200, unit="ns"))
+        await harness.run_until_complete(200)
 
         # Expect D4 C3 B2 A1 at offs..offs+3
         checkRegister(10, 0xD4, dut, False)
@@ -1830,7 +1813,8 @@ async def test_sd_lbu_readback(dut):
         ecall
     """
 
-    await resetAndPrepare(dut)
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
 
     # Pre-fill 8 bytes to catch missing byte-enables on SD
@@ -1838,8 +1822,7 @@ async def test_sd_lbu_readback(dut):
     for i, b in enumerate(preset):
         await awrite_u8(dut, BASE + i, b)
 
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(200, unit="ns"))
+    await harness.run_until_complete(200)
 
     expected = [0xEF,0xCD,0xAB,0x89,0x67,0x45,0x23,0x01]
     for reg, val in zip(range(10,18), expected):
@@ -1884,7 +1867,8 @@ async def test_dirty_eviction_writeback(dut):
         ecall
     """
 
-    await resetAndPrepare(dut)
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
 
     # Pre-fill backing memory so we can detect if write-back happened:
@@ -1894,8 +1878,7 @@ async def test_dirty_eviction_writeback(dut):
     # Also ensure CONFLICT line exists in memory (avoid OOB)
     await awrite_u8(dut, CONFLICT + 0, 0x5A)
 
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(400, unit="ns"))
+    await harness.run_until_complete(400)
 
     checkRegister(10, 0xAA, dut, False)
     checkRegister(11, 0xBB, dut, False)
@@ -1935,7 +1918,8 @@ async def test_dirty_eviction_near_eol(dut):
         ecall
     """
 
-    await resetAndPrepare(dut)
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
 
     # Pre-fill backing memory with different values so we can detect correct write-back.
@@ -1943,8 +1927,7 @@ async def test_dirty_eviction_near_eol(dut):
     await awrite_u8(dut, BASE + OFFS1, 0x66)
     await awrite_u8(dut, CONFLICT + 0, 0x99)
 
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(400, unit="ns"))
+    await harness.run_until_complete(400)
 
     checkRegister(10, 0xE1, dut, False)
     checkRegister(11, 0xE2, dut, False)
@@ -1970,13 +1953,13 @@ async def test_sw_dirty_eviction_then_reload(dut):
         ecall
     """
 
-    await resetAndPrepare(dut)
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
     for i, b in enumerate([0x01,0x23,0x45,0x67]):  # different preset
         await awrite_u8(dut, BASE + OFFS + i, b)
     await awrite_u8(dut, CONFLICT + 0, 0xAB)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(400, unit="ns"))
+    await harness.run_until_complete(400)
 
     checkRegister(10, 0xFFFFFFFFDEADBEEF, dut, False)  # sign-extended
     checkFinished(dut)
@@ -2015,7 +1998,8 @@ async def test_clean_eviction_no_spurious_write(dut):
         ecall
     """
 
-    await resetAndPrepare(dut)
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
 
     # IMPORTANT: prime backing memory AFTER reset + program load,
@@ -2026,8 +2010,7 @@ async def test_clean_eviction_no_spurious_write(dut):
     # Ensure conflict line exists in memory (not required for correctness, but explicit)
     await awrite_u8(dut, CONFLICT + 0, 0x77)
 
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(400, unit="ns"))
+    await harness.run_until_complete(400)
 
     # Expect original memory contents (no writeback should have occurred for a clean line)
     expect = {0:0x10, 1:0x20, 7:0x80, 15:0x00}
@@ -2063,7 +2046,8 @@ async def test_load_store_negative_offset(dut):
         ecall
     """
 
-    await resetAndPrepare(dut)
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
 
     # Initialize memory with known pattern at BASE
@@ -2076,8 +2060,7 @@ async def test_load_store_negative_offset(dut):
     for i in range(8):
         await awrite_u8(dut, BASE + i, (val >> (8*i)) & 0xFF)
 
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(200, unit="ns"))
+    await harness.run_until_complete(200)
 
     # Check the load via negative offset worked
     checkRegister(7, 0x0123456789ABCDEF, dut, False)
@@ -2106,11 +2089,11 @@ async def test_store_pos_load_neg(dut):
         ecall
     """
 
-    await resetAndPrepare(dut)
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
 
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(100, unit="ns"))
+    await harness.run_until_complete(100)
 
     checkRegister(4, 0x1122334455667788, dut, False)
     checkFinished(dut)
@@ -2139,11 +2122,11 @@ async def test_store_neg_load_pos(dut):
         ecall
     """
 
-    await resetAndPrepare(dut)
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
 
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(100, unit="ns"))
+    await harness.run_until_complete(100)
 
     checkRegister(4, 0xAABBCCDDEEFF0011, dut, False)
     checkFinished(dut)
@@ -2189,11 +2172,11 @@ async def crazy_test(dut):
                                                     
                                                                 ecall
                                                                 """
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
 
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(1000, unit="ns"))
+    await harness.run_until_complete(1000)
     # Final-state checks in calculation order
         # Set-by-immediates that never change afterward
        # Set by immediates and never changed later
@@ -2267,11 +2250,11 @@ async def test_patch_two_after_current_with_fence(dut):
         ecall
     """
 
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
 
-    await First(RisingEdge(dut.program_complete), Timer(200, unit="ns"))
+    await harness.run_until_complete(200)
 
     # Expected: x6 = 4 (spacer add) + 1 (patched TARGET) = 5
     checkFinished(dut)
@@ -2295,10 +2278,10 @@ async def test_jal_sets_return_address(dut):
     # PC=8: Program ends here.
     ecall
     """
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(50, unit="ns"))
+    await harness.run_until_complete(50)
 
     # The return address should be 4 (the address of the 'nop' after 'jal')
     checkRegister(1, 4, dut, False)
@@ -2349,11 +2332,11 @@ async def test_write_elsewhere_fence_and_jump(dut):
         .word 0x00000013                # addi x0, x0, 0 (nop)
     """
 
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
 
-    await First(RisingEdge(dut.program_complete), Timer(200, unit="ns"))
+    await harness.run_until_complete(200)
 
     # Expected: x18 = 7 from the patched code
     checkRegister(18, 7, dut, False)
@@ -2403,11 +2386,11 @@ POST:
 
     """
 
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
 
-    await First(RisingEdge(dut.program_complete), Timer(2000, unit="ns"))
+    await harness.run_until_complete(2000)
 
     # Expected: PREV now does addi x5,x5,3, then falls through to AFTER_PREV which jumps to POST -> ecall
     checkRegister(5, 3, dut, False)
@@ -2422,10 +2405,9 @@ async def test_fence(dut):
     add   x3, x1, x2
     ecall
     """
+    harness = Harness(dut)
+    await harness.hold_reset()
     loadAsmToMemory(asm, dut)
-    await resetAndPrepare(dut)
-    loadRegisters([0, 1535, 8462, 5473, 9], dut)
-    cocotb.start_soon(Clock(dut.clk, 1, unit="ns").start())
-    await First(RisingEdge(dut.program_complete), Timer(100, unit="ns"))
+    await harness.run_until_complete(100, registers=[0, 1535, 8462, 5473, 9])
     checkRegister(3, 1535 + 8462, dut)
     checkFinished(dut)
\ No newline at end of file
@@ -0,0 +1,296 @@
+import os
+import tempfile
+import shutil
+import atexit
+from cocotb.triggers import ReadOnly, ReadWrite
+
+# Byte-addressed facade over bram_over_axi's backing store
+# (main_memory.generate_blocks[b].mem_blk[e]). Geometry and handles are
+# resolved once per DUT; every test helper that touches memory goes
+# through get_memory_view(dut).
+
+# bram_over_axi (Verilator builds) can $writememh the whole memory on
+# request; see sim_image_path/sim_dump_req in the RTL. Loads always go
+# through the word handles, diffed against the shadow.
+BULK_MEM_ENABLED = os.environ.get("RISCV_BULK_MEM", "1") != "0"
+
+# ---------- shadow image ----------
+class MemoryShadow:
+    """
+    Python copy of DUT main memory, one int per word (None = unknown). Only
+    valid for words the RTL has not written since they were loaded: after a
+    run, mark whatever the program may have stored to with markMemoryDirty().
+    """
+    def __init__(self, n_words):
+        self.words = [None] * n_words
+
+    def invalidate(self, first_word=0, last_word=None):
+        last_word = len(self.words) - 1 if last_word is None else min(last_word, len(self.words) - 1)
+        for w in range(max(first_word, 0), last_word + 1):
+            self.words[w] = None
+
+# ---------- typed access ----------
+class _Typed:
+    """mv.u32[addr] / mv.u32[addr] = v: little-endian unsigned access of one width."""
+    __slots__ = ("_mv", "_n")
+
+    def __init__(self, mv, nbytes):
+        self._mv, self._n = mv, nbytes
+
+    def __getitem__(self, addr):
+        return int.from_bytes(self._mv.read(addr, self._n), "little")
+
+    def __setitem__(self, addr, value):
+        self._mv.write(addr, (value & ((1 << (8 * self._n)) - 1)).to_bytes(self._n, "little"))
+
+class MemoryView:
+    """
+    mv[a:b] -> bytes, mv[a:b] = data, mv[a] -> int, plus mv.u8/u16/u32/u64
+    typed accessors and to_numpy(). Writes are applied immediately through
+    VPI; a caller doing several of them awaits settle() once afterwards
+    instead of one delta per word.
+    """
+    def __init__(self, dut):
+        mem = dut.main_memory
+        self.dut = dut
+        self.NUMBER_OF_BLOCKS  = mem.NUMBER_OF_BLOCKS.value.to_unsigned()
+        self.ENTRIES_PER_BLOCK = mem.ENTRIES_PER_BLOCK.value.to_unsigned()
+        block_bits = mem.BLOCK_SIZE.value.to_unsigned()     # width of one mem word
+        if block_bits % 8 != 0:
+            raise ValueError(f"BLOCK_SIZE ({block_bits}) must be byte-aligned")
+        self.WORD_BYTES = block_bits // 8
+        self.n_words = self.NUMBER_OF_BLOCKS * self.ENTRIES_PER_BLOCK
+        self.size = self.n_words * self.WORD_BYTES
+        self._blocks = [mem.generate_blocks[b].mem_blk for b in range(self.NUMBER_OF_BLOCKS)]
+        self._handles = [None] * self.n_words
+        self.shadow = MemoryShadow(self.n_words)
+        self._bulk_dir = False   # not probed yet
+        self.u8, self.u16, self.u32, self.u64 = (_Typed(self, n) for n in (1, 2, 4, 8))
+
+    # ---- words ----
+    def handle(self, w):
+        """
+        Map linear word index -> (block, entry):
+          block = w % NUMBER_OF_BLOCKS
+          entry = w // NUMBER_OF_BLOCKS
+        """
+        h = self._handles[w]
+        if h is None:
+            h = self._handles[w] = self._blocks[w % self.NUMBER_OF_BLOCKS][w // self.NUMBER_OF_BLOCKS]
+        return h
+
+    def read_word(self, w) -> int:
+        return int(self.handle(w).value)
+
+    def write_word(self, w, value):
+        self.handle(w).value = value
+        self.shadow.words[w] = value
+
+    def _check(self, addr, length):
+        if addr < 0 or addr + length > self.size:
+            raise ValueError(f"Access [{addr:#x}, {addr + length:#x}) outside memory of {self.size:#x} bytes")
+
+    # ---- bytes ----
+    def read(self, addr, length) -> bytes:
+        if length <= 0:
+            return b""
+        self._check(addr, length)
+        WB = self.WORD_BYTES
+        first, last = addr // WB, (addr + length - 1) // WB
+        buf = b"".join(self.read_word(w).to_bytes(WB, "little") for w in range(first, last + 1))
+        start = addr - first * WB
+        return buf[start:start + length]
+
+    def write(self, addr, data):
+        """Byte-accurate write: whole words are stored directly, partial ones read-modify-written (LE)."""
+        if not data:
+            return
+        self._check(addr, len(data))
+        WB = self.WORD_BYTES
+        for w in range(addr // WB, (addr + len(data) - 1) // WB + 1):
+            word_addr = w * WB
+            lo = max(0, word_addr - addr)
+            hi = min(len(data), word_addr + WB - addr)
+            boff = addr + lo - word_addr  # byte offset in word
+            if hi - lo == WB:
+                self.write_word(w, int.from_bytes(data[lo:hi], "little"))
+                continue
+            word_bytes = bytearray(self.read_word(w).to_bytes(WB, "little"))
+            word_bytes[boff:boff + hi - lo] = data[lo:hi]
+            self.write_word(w, int.from_bytes(word_bytes, "little"))
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.size)
+            if step != 1:
+                raise ValueError("MemoryView slices must be contiguous")
+            return self.read(start, stop - start)
+        return self.read(key, 1)[0]
+
+    def __setitem__(self, key, data):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.size)
+            if step != 1 or stop - start != len(data):
+                raise ValueError("MemoryView slice assignment must be contiguous and size-preserving")
+            self.write(start, bytes(data))
+        else:
+            self.write(key, bytes([data & 0xFF]))
+
+    def to_numpy(self, dtype="uint8"):
+        """Snapshot of the whole memory as a NumPy array (numpy imported on first use)."""
+        import numpy as np
+        return np.frombuffer(self.read(0, self.size), dtype=np.dtype(dtype).newbyteorder("<")).copy()
+
+    async def settle(self):
+        """One delta so everything written since the last await is visible to the DUT."""
+        await ReadWrite()
+
+    # ---- shadow ----
+    def mark_dirty(self, addr=0, length=None):
+        last = None if length is None else (addr + length - 1) // self.WORD_BYTES
+        self.shadow.invalidate(addr // self.WORD_BYTES, last)
+
+    def read_shadowed(self, addr, length) -> bytes:
+        """Like read(), but only words the shadow does not know go through their handles."""
+        self._check(addr, length)
+        self.resync(addr, length)
+        WB = self.WORD_BYTES
+        first, last = addr // WB, (addr + length - 1) // WB
+        buf = b"".join(v.to_bytes(WB, "little") for v in self.shadow.words[first:last + 1])
+        start = addr - first * WB
+        return buf[start:start + length]
+
+    def resync(self, addr=0, length=None):
+        """Read back only the unknown (dirty) words of the range."""
+        words = self.shadow.words
+        first = addr // self.WORD_BYTES
+        last = self.n_words - 1 if length is None else (addr + length - 1) // self.WORD_BYTES
+        for w in range(first, last + 1):
+            if words[w] is None:
+                words[w] = self.read_word(w)
+
+    # ---- bulk dump port ----
+    def bulk_dir(self):
+        """Per-memory scratch dir for block hex files, or None when the RTL has no dump port."""
+        if self._bulk_dir is False:
+            mem = self.dut.main_memory
+            try:
+                mem.sim_dump_req, mem.sim_image_path
+            except AttributeError:
+                self._bulk_dir = None
+            else:
+                root = "/dev/shm" if os.path.isdir("/dev/shm") else None
+                path = tempfile.mkdtemp(prefix="rv_mem_", dir=root)
+                atexit.register(shutil.rmtree, path, True)
+                mem.sim_image_path.value = int.from_bytes(path.encode(), "big")
+                self._bulk_dir = path
+        return self._bulk_dir if BULK_MEM_ENABLED else None
+
+    async def dump(self) -> bytes:
+        """Whole memory as bytes: one $writememh per block when available, else per-handle reads."""
+        path = self.bulk_dir()
+        if path is None:
+            await ReadOnly()
+            return self.read(0, self.size)
+        req = self.dut.main_memory.sim_dump_req
+        req.value = (req.value.to_unsigned() + 1) & 0xFFFFFFFF
+        await self.settle()
+        words = [0] * self.n_words
+        for b in range(self.NUMBER_OF_BLOCKS):
+            with open(os.path.join(path, f"c{b}.hex")) as f:
+                vals = [int(tok, 16) for tok in f.read().split() if not tok.startswith("//")]
+            words[b::self.NUMBER_OF_BLOCKS] = vals[:self.ENTRIES_PER_BLOCK]
+        self.shadow.words[:] = words
+        return b"".join(v.to_bytes(self.WORD_BYTES, "little") for v in words)
+
+    # ---- program images ----
+    def load_image(self, compiled, *, clear_mem=True, diff=False):
+        """
+        Put `compiled` at address 0 (and zero the rest when clear_mem). With
+        diff=True only words that differ from the shadow image are written, so
+        a load costs as much as the change rather than the whole memory.
+        Returns the number of words written.
+        """
+        WB = self.WORD_BYTES
+        # How many words do we need to hold the compiled bytes?
+        total_words = (len(compiled) + WB - 1) // WB
+        needed_entries = (total_words + self.NUMBER_OF_BLOCKS - 1) // self.NUMBER_OF_BLOCKS
+        if needed_entries > self.ENTRIES_PER_BLOCK:
+            raise ValueError(
+                f"Program needs {needed_entries} entries per block, "
+                f"but ENTRIES_PER_BLOCK={self.ENTRIES_PER_BLOCK}"
+            )
+
+        # Pack bytes -> words (little-endian within each word)
+        padded = bytes(compiled) + bytes(total_words * WB - len(compiled))
+        image = [int.from_bytes(padded[w * WB:(w + 1) * WB], "little") for w in range(total_words)]
+        # Optional: clear memory
+        if clear_mem:
+            image += [0] * (self.n_words - total_words)
+
+        shadow = self.shadow.words
+        changed = [w for w, v in enumerate(image) if shadow[w] != v] if diff else range(len(image))
+        for w in changed:
+            self.write_word(w, image[w])
+        return len(changed)
+
+# ---------- read-through cache ----------
+class CacheOverlay:
+    """
+    Architectural view through a memory_with_bram_cache instance: bytes of
+    lines that are valid in the cache (cache_valid_dirty = {valid, dirty},
+    tag match) replace what the backing memory holds. Reading the arrays is
+    cheaper than forcing a dump_cache writeback and waiting for it.
+    """
+    def __init__(self, cache):
+        self.cache = cache
+        self.OFFSET_BITS = cache.OFFSET_BITS.value.to_unsigned()
+        self.INDEX_BITS = cache.INDEX_BITS.value.to_unsigned()
+        self.WORDS_PER_LINE = cache.WORDS_PER_LINE.value.to_unsigned()
+        self.LINE_BYTES = 1 << self.OFFSET_BITS
+        self.WORD_BYTES = self.LINE_BYTES // self.WORDS_PER_LINE
+        self._words = [cache.line_words[i].line_block for i in range(self.WORDS_PER_LINE)]
+
+    def line(self, line_addr):
+        """(dirty, bytes) of the cached copy of the line at `line_addr`, or None if not cached."""
+        index = (line_addr >> self.OFFSET_BITS) & ((1 << self.INDEX_BITS) - 1)
+        meta = int(self.cache.cache_valid_dirty[index].value)
+        if not meta & 0b10:
+            return None
+        if int(self.cache.cache_tags[index].value) != line_addr >> (self.OFFSET_BITS + self.INDEX_BITS):
+            return None
+        data = b"".join(int(blk[index].value).to_bytes(self.WORD_BYTES, "little") for blk in self._words)
+        return bool(meta & 0b01), data
+
+    def apply(self, addr, backing: bytes) -> bytes:
+        """`backing` (memory contents at `addr`) with every cached line patched in."""
+        out = bytearray(backing)
+        first = addr & ~(self.LINE_BYTES - 1)
+        for line_addr in range(first, addr + len(out), self.LINE_BYTES):
+            hit = self.line(line_addr)
+            if hit is None:
+                continue
+            data = hit[1]
+            lo, hi = max(line_addr, addr), min(line_addr + self.LINE_BYTES, addr + len(out))
+            out[lo - addr:hi - addr] = data[lo - line_addr:hi - line_addr]
+        return bytes(out)
+
+_overlays = {}
+
+def get_cache_overlay(cache) -> CacheOverlay:
+    ov = _overlays.get(cache._path)
+    if ov is None:
+        ov = _overlays[cache._path] = CacheOverlay(cache)
+    return ov
+
+_views = {}
+
+def get_memory_view(dut) -> MemoryView:
+    """The MemoryView for this DUT, created on first use."""
+    mv = _views.get(dut._path)
+    if mv is None:
+        mv = _views[dut._path] = MemoryView(dut)
+    return mv
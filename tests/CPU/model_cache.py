@@ -0,0 +1,118 @@
+"""
+Content-keyed cache of built Verilator models.
+
+    SIM_BUILD := $(shell python3 -m tests.CPU.model_cache dir --toplevel tp_lvl -- $(EXTRA_ARGS))
+
+prints sim_build/<toplevel>-<key>, where the key hashes the rtl/**/*.sv
+contents, the toplevel, the build arguments (parameter overrides, defines,
+trace flags, and the contents of any files they name), the Verilator version
+and the cocotb version. Switching suites or parameter sets therefore selects
+another directory instead of rebuilding over the current one.
+
+cocotb's Makefile rebuilds by mtime, so editing and then reverting a file, or
+switching git branches, would still rebuild a model whose inputs did not
+change. When the keyed directory already has a linked Vtop, it is touched
+(Vtop.mk, then Vtop) so make sees it as current. Only a real content change
+produces a new key and a fresh build.
+
+    python3 -m tests.CPU.model_cache prune --keep 8
+"""
+import argparse
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CACHE_DIR = os.path.join(ROOT, "sim_build")
+KEY_LEN = 16
+
+def _rtl_files(rtl_dir):
+    for dirpath, dirnames, filenames in os.walk(rtl_dir):
+        dirnames.sort()
+        for f in sorted(filenames):
+            if f.endswith(".sv"):
+                yield os.path.join(dirpath, f)
+
+def _tool_versions():
+    out = []
+    exe = shutil.which("verilator")
+    if exe:
+        try:
+            out.append(subprocess.run([exe, "--version"], capture_output=True, text=True).stdout.strip())
+        except OSError:
+            pass
+    try:
+        from importlib.metadata import version
+        out.append("cocotb " + version("cocotb"))
+    except Exception:
+        pass
+    return out
+
+def model_key(toplevel, args=(), rtl_dir=os.path.join(ROOT, "rtl")) -> str:
+    h = hashlib.sha256()
+    for path in _rtl_files(rtl_dir):
+        h.update(os.path.relpath(path, rtl_dir).encode() + b"\0")
+        with open(path, "rb") as f:
+            h.update(hashlib.sha256(f.read()).digest())
+    h.update(f"toplevel={toplevel}\0".encode())
+    for a in args:
+        h.update(a.encode() + b"\0")
+        if os.path.isfile(a):   # extra C++ or .vlt files go into the model too
+            with open(a, "rb") as f:
+                h.update(hashlib.sha256(f.read()).digest())
+    for v in _tool_versions():
+        h.update(v.encode() + b"\0")
+    return h.hexdigest()[:KEY_LEN]
+
+def model_dir(toplevel, args=(), cache_dir=CACHE_DIR) -> str:
+    return os.path.join(cache_dir, f"{toplevel}-{model_key(toplevel, args)}")
+
+def mark_current(sim_build):
+    """If sim_build holds a linked model, make it newer than every source."""
+    exe = os.path.join(sim_build, "Vtop")
+    mk = os.path.join(sim_build, "Vtop.mk")
+    if not (os.path.exists(exe) and os.path.exists(mk)):
+        return False
+    now = time.time()
+    os.utime(mk, (now, now))
+    os.utime(exe, (now, now))
+    return True
+
+def prune(keep, cache_dir=CACHE_DIR):
+    """Delete all but the `keep` most recently used keyed models; returns the removed paths."""
+    if not os.path.isdir(cache_dir):
+        return []
+    models = [os.path.join(cache_dir, d) for d in os.listdir(cache_dir)
+              if os.path.exists(os.path.join(cache_dir, d, "Vtop.mk"))]
+    models.sort(key=lambda d: os.path.getmtime(os.path.join(d, "Vtop.mk")), reverse=True)
+    for d in models[keep:]:
+        shutil.rmtree(d)
+    return models[keep:]
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    d = sub.add_parser("dir", help="print the model directory for a build and mark a cached one current")
+    d.add_argument("--toplevel", required=True)
+    d.add_argument("--cache-dir", default=CACHE_DIR)
+    d.add_argument("args", nargs=argparse.REMAINDER, help="verilator arguments after --")
+    p = sub.add_parser("prune", help="keep only the most recently used models")
+    p.add_argument("--keep", type=int, default=8)
+    p.add_argument("--cache-dir", default=CACHE_DIR)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "dir":
+        extra = args.args[1:] if args.args[:1] == ["--"] else args.args
+        path = model_dir(args.toplevel, extra, args.cache_dir)
+        mark_current(path)
+        print(path)
+    else:
+        for path in prune(args.keep, args.cache_dir):
+            print(f"removed {path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
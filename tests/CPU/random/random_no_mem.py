@@ -1,12 +1,12 @@
 import random
 import math
+import functools
 import cocotb
-from cocotb.clock import Clock, Timer
-from cocotb.triggers import RisingEdge, ReadOnly, ReadWrite, First
 import sys, os
 sys.path.append(os.path.dirname(__file__))
 from tests.CPU.riscv_tests_gen import *
 from tests.CPU.test_helpers import *
+from tests.CPU.riscv_asm import Inst, label
 
 
 
@@ -133,14 +133,14 @@ def build_rand_block(seed, idx, ref: RefState, len_block=25):
         0x7FFFFFFFFFFFFFFF, 0x8000000000000000,
         0x00000000FFFFFFFF, 0xFFFFFFFF00000000
     ]
-    asm = []
+    prog = []
     for r in regs[:8]:
         v = random.choice(interesting + [random.getrandbits(64) for _ in range(2)])
         if v < 0:
-            asm.append(f"li x{r}, {v}")
+            prog.append(Inst("li", rd=r, imm=v))
             ref.w(r, v & MASK)
         else:
-            asm.append(f"li x{r}, 0x{v & MASK:016x}")
+            prog.append(Inst("li", rd=r, imm=v & MASK))
             ref.w(r, v & MASK)
 
     # Random ALU mix
@@ -154,17 +154,17 @@ def build_rand_block(seed, idx, ref: RefState, len_block=25):
             op = random.choice(imm_ops)
             if op in ("slli","srli","srai"):
                 sh = rand_shamt64()
-                asm.append(f"{op} x{rd}, x{rs1}, {sh}")
+                prog.append(Inst(op, rd=rd, rs1=rs1, imm=sh))
                 ref.alu_imm(op, rd, rs1, sh)
             else:
                 imm = rand_imm12()
-                asm.append(f"{op} x{rd}, x{rs1}, {imm}")
+                prog.append(Inst(op, rd=rd, rs1=rs1, imm=imm))
                 ref.alu_imm(op, rd, rs1, imm)
         else:
             # bin op
             rd, rs1, rs2 = random.sample(regs, 3)
             op = random.choice(bin_ops)
-            asm.append(f"{op} x{rd}, x{rs1}, x{rs2}")
+            prog.append(Inst(op, rd=rd, rs1=rs1, rs2=rs2))
             ref.alu_bin(op, rd, rs1, rs2)
 
         # Occasionally drop a guaranteed-taken or guaranteed-not-taken branch
@@ -176,7 +176,7 @@ def build_rand_block(seed, idx, ref: RefState, len_block=25):
             cands = [r for r in regs if r not in (rsA, rsB)]
             mreg = random.choice(cands) if cands else random.choice(regs)
             ref.mark[mreg] = 1
-            asm.append(f"li x{mreg}, 99")
+            prog.append(Inst("li", rd=mreg, imm=99))
             ref.w(mreg, 99)
 
             a = ref.x[rsA] & MASK
@@ -211,31 +211,31 @@ def build_rand_block(seed, idx, ref: RefState, len_block=25):
             if rsB == 0:
                 rsB = mreg
             if (to_s64(b) < 0):
-                asm.append(f"li x{rsB}, {to_s64(b)}")
+                prog.append(Inst("li", rd=rsB, imm=to_s64(b)))
             else:
-                asm.append(f"li x{rsB}, 0x{b:016x}")
+                prog.append(Inst("li", rd=rsB, imm=b))
             ref.w(rsB, b)
             taken_actual = branch_taken(flavor, a & MASK, b & MASK)
 
             Lpass = f"L_PASS_{idx}_{_}"
             Ldone = f"L_DONE_{idx}_{_}"
-            asm.append(f"{flavor} x{rsA}, x{rsB}, {Lpass}")
-            asm.append(f"li x{mreg}, 2")          # fail mark
-            asm.append(f"jal x0, {Ldone}")        # NO LINK
-            asm.append(f"{Lpass}:")
-            asm.append(f"li x{mreg}, 1")          # pass mark
-            asm.append(f"{Ldone}:")
+            prog.append(Inst(flavor, rs1=rsA, rs2=rsB, label=Lpass))
+            prog.append(Inst("li", rd=mreg, imm=2))          # fail mark
+            prog.append(Inst("jal", rd=0, label=Ldone))        # NO LINK
+            prog.append(label(Lpass))
+            prog.append(Inst("li", rd=mreg, imm=1))          # pass mark
+            prog.append(label(Ldone))
             ref.w(mreg, 1 if taken_actual else 2)
 
         # Occasionally drop a forward JAL skip (verifies control transfer only)
         if random.random() < 0.08:
             skip = f"SKIP_{idx}_{_}"
             mr = random.choice(regs)
-            asm.append(f"li x{mr}, 99")
-            asm.append(f"jal x0, {skip}")        # NO LINK
-            asm.append(f"li x{mr}, 2")           # must be skipped
-            asm.append(f"{skip}:")
-            asm.append(f"li x{mr}, 1")
+            prog.append(Inst("li", rd=mr, imm=99))
+            prog.append(Inst("jal", rd=0, label=skip))        # NO LINK
+            prog.append(Inst("li", rd=mr, imm=2))           # must be skipped
+            prog.append(label(skip))
+            prog.append(Inst("li", rd=mr, imm=1))
             ref.w(mr, 1)
 
         # Occasionally drop an AUIPC-based JALR to a known label (no link, scratch x31)
@@ -244,47 +244,53 @@ def build_rand_block(seed, idx, ref: RefState, len_block=25):
             lbl = f"LBL_{idx}_{_}"
             mr = random.choice(regs)
 
-            asm.append(f"li x{mr}, 99")
-            asm.append(f"{lbl}:")
-            asm.append(f"auipc x31, %pcrel_hi({tgt})")
-            asm.append(f"addi  x31, x31, %pcrel_lo({lbl})")  # pair with AUIPC at {lbl}
-            asm.append(f"jalr  x0, x31, 0")                  # NO LINK
+            prog.append(Inst("li", rd=mr, imm=99))
+            prog.append(label(lbl))
+            prog.append(Inst("auipc", rd=31, label=tgt))
+            prog.append(Inst("addi", rd=31, rs1=31, label=lbl))  # pair with AUIPC at {lbl}
+            prog.append(Inst("jalr", rd=0, rs1=31, imm=0))          # NO LINK
 
-            asm.append(f"li x{mr}, 2")       # fall-through must be skipped
-            asm.append(f"{tgt}:")
-            asm.append(f"li x{mr}, 1")
+            prog.append(Inst("li", rd=mr, imm=2))       # fall-through must be skipped
+            prog.append(label(tgt))
+            prog.append(Inst("li", rd=mr, imm=1))
             ref.w(mr, 1)
 
-    return "\n".join(asm)
+    return prog
+
+def prepare_batch(seed, len_block, indices):
+    """(index, oracle, IR, assembled program) per index; runs in a prep worker."""
+    refs, programs = [], []
+    for i in indices:
+        ref = RefState()
+        body = build_rand_block(seed, i, ref, len_block=len_block)
+        refs.append(ref)
+        programs.append(body + [Inst("ecall")])
+    return list(zip(indices, refs, programs, assemble_programs(programs)))
 
 @cocotb.test()
 async def test_randomized_non_memory_fuzz(dut):
     NUM_PROGRAMS = 1000
     LEN_BLOCK = 200
-    BASE_SEED = 0xC0FFEE  # tweak for different runs
-
-    for i in range(NUM_PROGRAMS):
-        ref = RefState()
-        body = build_rand_block(BASE_SEED, i, ref, len_block=LEN_BLOCK)
-        asm = f"""
-        # --- randomized non-memory fuzz {i} ---
-        {body}
-        ecall
-        """
-        dut._log.info(asm)
-        await resetAndPrepare(dut)
-        loadAsmToMemory(asm, dut)
-        await ReadWrite()
-        clock = Clock(dut.clk, 1, unit="ns")
-        cocotb.start_soon(clock.start())
-        await First(RisingEdge(dut.program_complete), Timer(5000, unit="ns"))
-        checkFinished(dut)
-        clock.stop()
-
-        # Verify all registers we actually touched; skip x31 (scratch)
-        for r in range(1, 32):
-            if r == 31:
-                continue
-            exp = ref.x[r]
-            if exp != 0 or r in ref.mark:
-                checkRegister(r, to_s64(exp), dut, True)
+    BASE_SEED = fuzzSeed(0xC0FFEE)  # RISCV_FUZZ_SEED overrides
+    BATCH_SIZE = 10       # programs per prep task (generated/lowered together)
+
+    harness = Harness(dut)
+    total_cycles = 0
+    prepare = functools.partial(prepare_batch, BASE_SEED, LEN_BLOCK)
+    for bundle in prefetch_map(prepare, chunked(shardRange(NUM_PROGRAMS), BATCH_SIZE)):
+        for i, ref, program, prog in bundle:
+            diag = ProgramDiagnostics.from_program("randomized non-memory fuzz", prog, program,
+                                                   seed=BASE_SEED, index=i)
+            diag.log_if_enabled(dut)
+            await harness.hold_reset()
+            loadCompiledToMemory(prog.raw, dut, diff=True)  # ALU-only programs never store
+            lockstep = startLockstep(dut, prog)   # None unless RISCV_LOCKSTEP=1
+            with diag.on_failure(dut, harness=harness):
+                cycles = await harness.run_until_complete(cycleBudget(len(prog.raw) // 4), lockstep)
+                total_cycles += cycles
+                dut._log.debug(f"program {i}: {cycles} cycles")
+
+                # Verify all registers we actually touched; skip x31 (scratch)
+                checkRegisters({r: to_s64(ref.x[r]) for r in range(1, 31)
+                                if ref.x[r] != 0 or r in ref.mark}, dut, signed=True)
+    dut._log.info(f"{len(shardRange(NUM_PROGRAMS))} programs, {total_cycles} cycles")
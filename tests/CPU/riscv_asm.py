@@ -0,0 +1,408 @@
+import re
+import struct
+
+from tests.CPU.elf_utils import LOCAL_PREFIXES
+from tests.CPU.riscv_disasm import Listing
+
+# In-process RV64I + Zifencei assembler for the small grammar the fuzz
+# generators emit. Anything outside that grammar raises UnsupportedAsm and
+# the caller falls back to the GNU toolchain (see riscv_tests_gen.assemble_rv32i).
+
+XLEN = 64
+MASK = (1 << XLEN) - 1
+
+class UnsupportedAsm(ValueError):
+    """Source uses something this assembler does not handle; use binutils instead."""
+
+ABI_NAMES = {
+    "zero": 0, "ra": 1, "sp": 2, "gp": 3, "tp": 4, "t0": 5, "t1": 6, "t2": 7,
+    "s0": 8, "fp": 8, "s1": 9, "a0": 10, "a1": 11, "a2": 12, "a3": 13, "a4": 14,
+    "a5": 15, "a6": 16, "a7": 17, "s2": 18, "s3": 19, "s4": 20, "s5": 21,
+    "s6": 22, "s7": 23, "s8": 24, "s9": 25, "s10": 26, "s11": 27, "t3": 28,
+    "t4": 29, "t5": 30, "t6": 31,
+}
+
+# ---------- encoding tables ----------
+# op -> (opcode, funct3, funct7)
+R_OPS = {
+    "add":  (0x33, 0, 0x00), "sub":  (0x33, 0, 0x20), "sll":  (0x33, 1, 0x00),
+    "slt":  (0x33, 2, 0x00), "sltu": (0x33, 3, 0x00), "xor":  (0x33, 4, 0x00),
+    "srl":  (0x33, 5, 0x00), "sra":  (0x33, 5, 0x20), "or":   (0x33, 6, 0x00),
+    "and":  (0x33, 7, 0x00),
+    "addw": (0x3B, 0, 0x00), "subw": (0x3B, 0, 0x20), "sllw": (0x3B, 1, 0x00),
+    "srlw": (0x3B, 5, 0x00), "sraw": (0x3B, 5, 0x20),
+}
+# op -> (opcode, funct3)
+I_OPS = {
+    "addi": (0x13, 0), "slti": (0x13, 2), "sltiu": (0x13, 3), "xori": (0x13, 4),
+    "ori":  (0x13, 6), "andi": (0x13, 7), "addiw": (0x1B, 0),
+}
+# op -> (opcode, funct3, funct6/7 upper bits, shamt bits)
+SHIFT_OPS = {
+    "slli":  (0x13, 1, 0x00, 6), "srli":  (0x13, 5, 0x00, 6), "srai":  (0x13, 5, 0x10, 6),
+    "slliw": (0x1B, 1, 0x00, 5), "srliw": (0x1B, 5, 0x00, 5), "sraiw": (0x1B, 5, 0x20, 5),
+}
+LOAD_OPS  = {"lb": 0, "lh": 1, "lw": 2, "ld": 3, "lbu": 4, "lhu": 5, "lwu": 6}
+STORE_OPS = {"sb": 0, "sh": 1, "sw": 2, "sd": 3}
+BRANCH_OPS = {"beq": 0, "bne": 1, "blt": 4, "bge": 5, "bltu": 6, "bgeu": 7}
+SYSTEM_OPS = {"ecall": 0x00000073, "ebreak": 0x00100073, "fence.i": 0x0000100F}
+
+OP_LUI, OP_AUIPC, OP_JAL, OP_JALR, OP_LOAD, OP_STORE, OP_BRANCH = 0x37, 0x17, 0x6F, 0x67, 0x03, 0x23, 0x63
+
+def to_signed(v, bits=XLEN):
+    v &= (1 << bits) - 1
+    return v - (1 << bits) if v >> (bits - 1) else v
+
+def fits_signed(v, bits):
+    return -(1 << (bits - 1)) <= v < (1 << (bits - 1))
+
+def enc_r(opcode, f3, f7, rd, rs1, rs2):
+    return (f7 << 25) | (rs2 << 20) | (rs1 << 15) | (f3 << 12) | (rd << 7) | opcode
+
+def enc_i(opcode, f3, rd, rs1, imm):
+    if not fits_signed(imm, 12):
+        raise UnsupportedAsm(f"12-bit immediate out of range: {imm}")
+    return ((imm & 0xFFF) << 20) | (rs1 << 15) | (f3 << 12) | (rd << 7) | opcode
+
+def enc_s(f3, rs1, rs2, imm):
+    if not fits_signed(imm, 12):
+        raise UnsupportedAsm(f"12-bit immediate out of range: {imm}")
+    imm &= 0xFFF
+    return ((imm >> 5) << 25) | (rs2 << 20) | (rs1 << 15) | (f3 << 12) | ((imm & 0x1F) << 7) | OP_STORE
+
+def enc_b(f3, rs1, rs2, off):
+    if off & 1 or not fits_signed(off, 13):
+        raise UnsupportedAsm(f"branch offset out of range: {off}")
+    off &= 0x1FFF
+    return (((off >> 12) & 1) << 31) | (((off >> 5) & 0x3F) << 25) | (rs2 << 20) | (rs1 << 15) \
+        | (f3 << 12) | (((off >> 1) & 0xF) << 8) | (((off >> 11) & 1) << 7) | OP_BRANCH
+
+def enc_u(opcode, rd, imm20):
+    if not 0 <= imm20 < (1 << 20):
+        raise UnsupportedAsm(f"20-bit immediate out of range: {imm20}")
+    return (imm20 << 12) | (rd << 7) | opcode
+
+def enc_j(rd, off):
+    if off & 1 or not fits_signed(off, 21):
+        raise UnsupportedAsm(f"jal offset out of range: {off}")
+    off &= 0x1FFFFF
+    return (((off >> 20) & 1) << 31) | (((off >> 1) & 0x3FF) << 21) | (((off >> 11) & 1) << 20) \
+        | (((off >> 12) & 0xFF) << 12) | (rd << 7) | OP_JAL
+
+# ---------- li expansion (mirrors gas's load_const for RV64) ----------
+def expand_li(rd, value):
+    """
+    Return [(op, rd, rs1, imm), ...] exactly as GNU as expands `li rd, value`:
+    lui/addiw for sign-extended 32-bit constants (addi alone when no upper
+    part), otherwise recurse on the upper bits and finish with slli/addi.
+    """
+    value = to_signed(value)
+    lower = ((value & 0xFFF) ^ 0x800) - 0x800
+    upper = to_signed(value - lower)
+    if not fits_signed(value, 32):
+        shift = 12
+        while not (upper >> shift) & 1:
+            shift += 1
+        seq = expand_li(rd, upper >> shift)
+        seq.append(("slli", rd, rd, shift))
+        if lower != 0:
+            seq.append(("addi", rd, rd, lower))
+        return seq
+    seq = []
+    hi_reg = 0
+    if upper != 0:
+        seq.append(("lui", rd, 0, (upper & 0xFFFFFFFF) >> 12))
+        hi_reg = rd
+    if lower != 0 or hi_reg == 0:
+        seq.append(("addiw" if hi_reg else "addi", rd, hi_reg, lower))
+    return seq
+
+# ---------- instruction IR ----------
+class Inst:
+    """
+    One instruction as (op, rd, rs1, rs2, imm, label).
+      - stores keep the base in rs1 and the data register in rs2
+      - `label` is the symbolic operand: branch/jal target, %pcrel_hi
+        target for auipc, %pcrel_lo anchor (the auipc's label) for addi
+      - labels themselves are Inst("label", label=name)
+      - `li` is kept as one pseudo-op and expanded at lowering time
+    """
+    __slots__ = ("op", "rd", "rs1", "rs2", "imm", "label")
+
+    def __init__(self, op, rd=0, rs1=0, rs2=0, imm=0, label=None):
+        self.op, self.rd, self.rs1, self.rs2, self.imm, self.label = op, rd, rs1, rs2, imm, label
+
+    def __repr__(self):
+        return f"Inst({self.op!r}, rd={self.rd}, rs1={self.rs1}, rs2={self.rs2}, imm={self.imm}, label={self.label!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, Inst) and all(getattr(self, f) == getattr(other, f) for f in Inst.__slots__)
+
+    def __str__(self):
+        """GNU-as compatible source text; only needed for logs and the binutils fallback."""
+        op = self.op
+        if op == "label":
+            return f"{self.label}:"
+        if op in R_OPS:
+            return f"{op} x{self.rd}, x{self.rs1}, x{self.rs2}"
+        if op in I_OPS:
+            imm = f"%pcrel_lo({self.label})" if self.label else self.imm
+            return f"{op} x{self.rd}, x{self.rs1}, {imm}"
+        if op in SHIFT_OPS:
+            return f"{op} x{self.rd}, x{self.rs1}, {self.imm}"
+        if op in LOAD_OPS or op == "jalr":
+            return f"{op} x{self.rd}, {self.imm}(x{self.rs1})"
+        if op in STORE_OPS:
+            return f"{op} x{self.rs2}, {self.imm}(x{self.rs1})"
+        if op in BRANCH_OPS:
+            return f"{op} x{self.rs1}, x{self.rs2}, {self.label}"
+        if op == "jal":
+            return f"jal x{self.rd}, {self.label}"
+        if op in ("lui", "auipc"):
+            imm = f"%pcrel_hi({self.label})" if self.label else f"0x{self.imm:x}"
+            return f"{op} x{self.rd}, {imm}"
+        if op == "li":
+            v = self.imm
+            return f"li x{self.rd}, {v}" if v < 0 or v < 0x10000 else f"li x{self.rd}, 0x{v & MASK:016x}"
+        return op
+
+def label(name):
+    return Inst("label", label=name)
+
+def render(insts):
+    """Source text for a list of Inst."""
+    return "\n".join(str(i) for i in insts)
+
+# ---------- parsing ----------
+LABEL_RE = re.compile(r"^\s*([A-Za-z_.$][\w.$]*|\d+)\s*:")
+MEM_RE = re.compile(r"^(.*)\((\w+)\)$")
+RELOC_RE = re.compile(r"^%(pcrel_hi|pcrel_lo)\(\s*([\w.$]+)\s*\)$")
+IGNORED_DIRECTIVES = {".text"}
+
+def parse_reg(tok):
+    tok = tok.strip()
+    if tok in ABI_NAMES:
+        return ABI_NAMES[tok]
+    if re.fullmatch(r"x([0-9]|[12][0-9]|3[01])", tok):
+        return int(tok[1:])
+    raise UnsupportedAsm(f"not a register: {tok!r}")
+
+def parse_int(tok):
+    """Integer literal the way gas reads it (0x, 0b, leading-0 octal, decimal)."""
+    t = tok.strip().replace("_", "")
+    neg = t.startswith("-")
+    if neg or t.startswith("+"):
+        t = t[1:]
+    try:
+        if t[:2] in ("0x", "0X"):
+            v = int(t[2:], 16)
+        elif t[:2] in ("0b", "0B"):
+            v = int(t[2:], 2)
+        elif len(t) > 1 and t[0] == "0":
+            v = int(t[1:], 8)
+        else:
+            v = int(t, 10)
+    except ValueError:
+        raise UnsupportedAsm(f"not an integer: {tok!r}") from None
+    return -v if neg else v
+
+def _parse_mem(tok, line):
+    m = MEM_RE.match(tok)
+    if not m:
+        raise UnsupportedAsm(line)
+    return (parse_int(m.group(1)) if m.group(1).strip() else 0), parse_reg(m.group(2))
+
+def _parse_insn(op, a, line):
+    if op in R_OPS:
+        return Inst(op, rd=parse_reg(a[0]), rs1=parse_reg(a[1]), rs2=parse_reg(a[2]))
+    if op in I_OPS:
+        m = RELOC_RE.match(a[2])
+        if m:
+            if m.group(1) != "pcrel_lo" or op != "addi":
+                raise UnsupportedAsm(line)
+            return Inst(op, rd=parse_reg(a[0]), rs1=parse_reg(a[1]), label=m.group(2))
+        return Inst(op, rd=parse_reg(a[0]), rs1=parse_reg(a[1]), imm=parse_int(a[2]))
+    if op in SHIFT_OPS:
+        return Inst(op, rd=parse_reg(a[0]), rs1=parse_reg(a[1]), imm=parse_int(a[2]))
+    if op in LOAD_OPS and len(a) == 2:
+        imm, base = _parse_mem(a[1], line)
+        return Inst(op, rd=parse_reg(a[0]), rs1=base, imm=imm)
+    if op in STORE_OPS and len(a) == 2:
+        imm, base = _parse_mem(a[1], line)
+        return Inst(op, rs1=base, rs2=parse_reg(a[0]), imm=imm)
+    if op in BRANCH_OPS:
+        return Inst(op, rs1=parse_reg(a[0]), rs2=parse_reg(a[1]), label=a[2])
+    if op == "jal":
+        return Inst(op, rd=parse_reg(a[0]), label=a[1]) if len(a) == 2 else Inst(op, rd=1, label=a[0])
+    if op == "jalr":
+        if len(a) == 3:
+            return Inst(op, rd=parse_reg(a[0]), rs1=parse_reg(a[1]), imm=parse_int(a[2]))
+        if len(a) == 2:
+            imm, base = _parse_mem(a[1], line)
+            return Inst(op, rd=parse_reg(a[0]), rs1=base, imm=imm)
+        if len(a) == 1:
+            return Inst(op, rd=1, rs1=parse_reg(a[0]))
+        raise UnsupportedAsm(line)
+    if op in ("lui", "auipc"):
+        m = RELOC_RE.match(a[1])
+        if m:
+            if m.group(1) != "pcrel_hi" or op != "auipc":
+                raise UnsupportedAsm(line)
+            return Inst(op, rd=parse_reg(a[0]), label=m.group(2))
+        return Inst(op, rd=parse_reg(a[0]), imm=parse_int(a[1]))
+    if op == "li" and len(a) == 2:
+        return Inst(op, rd=parse_reg(a[0]), imm=parse_int(a[1]))
+    if op == "nop" and not a:
+        return Inst("addi")
+    if op in SYSTEM_OPS and not a:
+        return Inst(op)
+    raise UnsupportedAsm(f"instruction not supported: {line!r}")
+
+def parse(asm: str):
+    """Source text -> [Inst]; raises UnsupportedAsm outside the supported grammar."""
+    insts = []
+    for line in asm.splitlines():
+        line = line.split("#", 1)[0].strip()
+        while True:
+            m = LABEL_RE.match(line)
+            if not m:
+                break
+            insts.append(label(m.group(1)))
+            line = line[m.end():].strip()
+        if not line:
+            continue
+        if line.startswith("."):
+            parts = line.split()
+            if parts[0] in IGNORED_DIRECTIVES or parts[:2] == [".option", "norvc"]:
+                continue
+            raise UnsupportedAsm(f"directive not supported: {line!r}")
+        parts = line.split(None, 1)
+        operands = [t.strip() for t in parts[1].split(",")] if len(parts) > 1 else []
+        try:
+            insts.append(_parse_insn(parts[0].lower(), operands, line))
+        except IndexError:
+            raise UnsupportedAsm(f"missing operand: {line!r}") from None
+    return insts
+
+# ---------- lowering ----------
+class _Layout:
+    """Label addresses for one program placed at address 0."""
+    def __init__(self, insts):
+        self.symbols = {}
+        self.numeric = {}  # "1" -> [addr, ...] in program order, for 1b/1f references
+        self.addrs = []
+        addr = 0
+        for inst in insts:
+            self.addrs.append(addr)
+            if inst.op == "label":
+                name = inst.label
+                if name.isdigit():
+                    self.numeric.setdefault(name, []).append(addr)
+                elif name in self.symbols:
+                    raise UnsupportedAsm(f"duplicate label {name}")
+                else:
+                    self.symbols[name] = addr
+            elif inst.op == "li":
+                addr += 4 * len(expand_li(inst.rd, inst.imm))
+            else:
+                addr += 4
+        self.auipc_hi = {}  # auipc address -> target address of its %pcrel_hi
+
+    def resolve(self, name, pc):
+        if re.fullmatch(r"\d+[bf]", name):
+            addrs = self.numeric.get(name[:-1], [])
+            if name[-1] == "b":
+                cands = [a for a in addrs if a <= pc]
+                if cands:
+                    return cands[-1]
+            else:
+                cands = [a for a in addrs if a > pc]
+                if cands:
+                    return cands[0]
+        elif name in self.symbols:
+            return self.symbols[name]
+        raise UnsupportedAsm(f"unknown label {name!r}")
+
+def _encode(inst, pc, layout):
+    """[word, ...] for one Inst at `pc`."""
+    op = inst.op
+    if op in R_OPS:
+        opc, f3, f7 = R_OPS[op]
+        return [enc_r(opc, f3, f7, inst.rd, inst.rs1, inst.rs2)]
+    if op in I_OPS:
+        opc, f3 = I_OPS[op]
+        imm = inst.imm
+        if inst.label:
+            auipc_pc = layout.resolve(inst.label, pc)
+            if auipc_pc not in layout.auipc_hi:
+                raise UnsupportedAsm(f"%pcrel_lo label is not a %pcrel_hi auipc: {inst}")
+            off = layout.auipc_hi[auipc_pc] - auipc_pc
+            imm = off - (to_signed(((off + 0x800) >> 12) & 0xFFFFF, 20) << 12)
+        return [enc_i(opc, f3, inst.rd, inst.rs1, imm)]
+    if op in SHIFT_OPS:
+        opc, f3, hi, bits = SHIFT_OPS[op]
+        sh = inst.imm
+        if not 0 <= sh < (1 << bits):
+            raise UnsupportedAsm(f"shift amount out of range: {inst}")
+        word = (hi << 26 if bits == 6 else hi << 25) | (sh << 20) | (inst.rs1 << 15) | (f3 << 12) | (inst.rd << 7) | opc
+        return [word]
+    if op in LOAD_OPS:
+        return [enc_i(OP_LOAD, LOAD_OPS[op], inst.rd, inst.rs1, inst.imm)]
+    if op in STORE_OPS:
+        return [enc_s(STORE_OPS[op], inst.rs1, inst.rs2, inst.imm)]
+    if op in BRANCH_OPS:
+        tgt = layout.resolve(inst.label, pc)
+        return [enc_b(BRANCH_OPS[op], inst.rs1, inst.rs2, tgt - pc)]
+    if op == "jal":
+        tgt = layout.resolve(inst.label, pc)
+        return [enc_j(inst.rd, tgt - pc)]
+    if op == "jalr":
+        return [enc_i(OP_JALR, 0, inst.rd, inst.rs1, inst.imm)]
+    if op in ("lui", "auipc"):
+        imm = inst.imm
+        if inst.label:
+            if op != "auipc":
+                raise UnsupportedAsm(str(inst))
+            tgt = layout.resolve(inst.label, pc)
+            layout.auipc_hi[pc] = tgt
+            imm = ((tgt - pc + 0x800) >> 12) & 0xFFFFF
+        return [enc_u(OP_LUI if op == "lui" else OP_AUIPC, inst.rd, imm)]
+    if op == "li":
+        out = []
+        for sub, rd, rs1, imm in expand_li(inst.rd, inst.imm):
+            if sub == "lui":
+                out.append(enc_u(OP_LUI, rd, imm))
+            elif sub == "slli":
+                out.append(enc_i(0x13, 1, rd, rs1, imm))
+            else:
+                opc, f3 = I_OPS[sub]
+                out.append(enc_i(opc, f3, rd, rs1, imm))
+        return out
+    if op in SYSTEM_OPS:
+        return [SYSTEM_OPS[op]]
+    raise UnsupportedAsm(f"instruction not supported: {inst!r}")
+
+def lower_words(insts):
+    """
+    [Inst] -> ([32-bit words], symbols), program placed at address 0.
+    Like the GNU path, symbols leave out .L locals and mapping symbols.
+    """
+    layout = _Layout(insts)
+    words = []
+    for inst, pc in zip(insts, layout.addrs):
+        if inst.op != "label":
+            words.extend(_encode(inst, pc, layout))
+    return words, {n: a for n, a in layout.symbols.items() if not n.startswith(LOCAL_PREFIXES)}
+
+def lower(insts):
+    """
+    [Inst] -> (raw bytes, mnemonics, symbols), the same shape as the GNU
+    path; mnemonics are decoded lazily. Raises UnsupportedAsm for anything the encoder cannot express.
+    """
+    words, symbols = lower_words(insts)
+    raw = struct.pack(f"<{len(words)}I", *words)
+    return raw, Listing(raw, 0, symbols), symbols
+
+def assemble(asm: str):
+    """Assemble source text at address 0; see lower()."""
+    return lower(parse(asm))
@@ -0,0 +1,170 @@
+import bisect
+from collections.abc import Sequence
+
+# Table-driven RV64I + Zifencei decoder producing the same text as
+# `objdump -d -M numeric,no-aliases`, so in-process disassembly can stand in
+# for objdump in bit grids, memory dumps and failure reports.
+
+def _sext(v, bits):
+    v &= (1 << bits) - 1
+    return v - (1 << bits) if v >> (bits - 1) else v
+
+# (opcode, funct3, funct7 or None) -> (mnemonic, format)
+# funct7 None means the funct3 alone selects the instruction.
+_TABLE = {}
+
+def _add(opcode, f3, f7, name, fmt):
+    _TABLE[(opcode, f3, f7)] = (name, fmt)
+
+for _f3, _n in enumerate(["beq", "bne", None, None, "blt", "bge", "bltu", "bgeu"]):
+    if _n:
+        _add(0x63, _f3, None, _n, "B")
+for _f3, _n in enumerate(["lb", "lh", "lw", "ld", "lbu", "lhu", "lwu", None]):
+    if _n:
+        _add(0x03, _f3, None, _n, "L")
+for _f3, _n in enumerate(["sb", "sh", "sw", "sd"]):
+    _add(0x23, _f3, None, _n, "S")
+for _f3, _n in {0: "addi", 2: "slti", 3: "sltiu", 4: "xori", 6: "ori", 7: "andi"}.items():
+    _add(0x13, _f3, None, _n, "I")
+_add(0x1B, 0, None, "addiw", "I")
+# Shifts: funct7 here is imm[11:6] (RV64) or imm[11:5] (*W forms)
+_add(0x13, 1, 0x00, "slli", "SH6")
+_add(0x13, 5, 0x00, "srli", "SH6")
+_add(0x13, 5, 0x10, "srai", "SH6")
+_add(0x1B, 1, 0x00, "slliw", "SH5")
+_add(0x1B, 5, 0x00, "srliw", "SH5")
+_add(0x1B, 5, 0x20, "sraiw", "SH5")
+for (_f3, _f7), _n in {
+    (0, 0x00): "add", (0, 0x20): "sub", (1, 0x00): "sll", (2, 0x00): "slt",
+    (3, 0x00): "sltu", (4, 0x00): "xor", (5, 0x00): "srl", (5, 0x20): "sra",
+    (6, 0x00): "or", (7, 0x00): "and",
+}.items():
+    _add(0x33, _f3, _f7, _n, "R")
+for (_f3, _f7), _n in {
+    (0, 0x00): "addw", (0, 0x20): "subw", (1, 0x00): "sllw", (5, 0x00): "srlw", (5, 0x20): "sraw",
+}.items():
+    _add(0x3B, _f3, _f7, _n, "R")
+_add(0x67, 0, None, "jalr", "L")
+_add(0x0F, 0, None, "fence", "FENCE")
+_add(0x0F, 1, None, "fence.i", "NONE")
+
+_SYSTEM = {0x00000073: "ecall", 0x00100073: "ebreak"}
+
+class Symbolizer:
+    """Maps an address to objdump's `<name>` / `<name+0x..>` annotation."""
+    def __init__(self, symbols=None):
+        pairs = sorted((a, n) for n, a in (symbols or {}).items())
+        self._addrs = [a for a, _ in pairs]
+        self._names = [n for _, n in pairs]
+
+    def __call__(self, addr):
+        i = bisect.bisect_right(self._addrs, addr) - 1
+        if i < 0:
+            return f"{addr:x}"
+        off = addr - self._addrs[i]
+        name = self._names[i] if off == 0 else f"{self._names[i]}+0x{off:x}"
+        return f"{addr:x} <{name}>"
+
+def _fence_set(bits):
+    return "".join(c for c, m in zip("iorw", (8, 4, 2, 1)) if bits & m) or "0"
+
+def decode(word: int):
+    """(mnemonic, format) for a 32-bit word, or None if it is not RV64I/Zifencei."""
+    opcode = word & 0x7F
+    if opcode in (0x37, 0x17):
+        return ("lui" if opcode == 0x37 else "auipc", "U")
+    if opcode == 0x6F:
+        return ("jal", "J")
+    if opcode == 0x73:
+        name = _SYSTEM.get(word)
+        return (name, "NONE") if name else None
+    f3 = (word >> 12) & 7
+    hit = _TABLE.get((opcode, f3, None))
+    if hit:
+        return hit
+    if opcode in (0x13, 0x1B):
+        f7 = (word >> 26) if opcode == 0x13 else (word >> 25)
+        return _TABLE.get((opcode, f3, f7))
+    return _TABLE.get((opcode, f3, word >> 25))
+
+def disassemble_word(word: int, pc: int = 0, symbolize=None) -> str:
+    """objdump `-M numeric,no-aliases` text for one instruction at `pc`."""
+    word &= 0xFFFFFFFF
+    hit = decode(word)
+    if hit is None:
+        return f".4byte\t0x{word:x}"
+    name, fmt = hit
+    symbolize = symbolize or Symbolizer()
+    rd, rs1, rs2 = (word >> 7) & 31, (word >> 15) & 31, (word >> 20) & 31
+    if fmt == "R":
+        return f"{name}\tx{rd},x{rs1},x{rs2}"
+    if fmt == "I":
+        return f"{name}\tx{rd},x{rs1},{_sext(word >> 20, 12)}"
+    if fmt == "SH6":
+        return f"{name}\tx{rd},x{rs1},0x{(word >> 20) & 0x3F:x}"
+    if fmt == "SH5":
+        return f"{name}\tx{rd},x{rs1},0x{rs2:x}"
+    if fmt == "L":
+        return f"{name}\tx{rd},{_sext(word >> 20, 12)}(x{rs1})"
+    if fmt == "S":
+        imm = _sext(((word >> 25) << 5) | rd, 12)
+        return f"{name}\tx{rs2},{imm}(x{rs1})"
+    if fmt == "B":
+        off = _sext((((word >> 31) & 1) << 12) | (((word >> 7) & 1) << 11)
+                    | (((word >> 25) & 0x3F) << 5) | (((word >> 8) & 0xF) << 1), 13)
+        return f"{name}\tx{rs1},x{rs2},{symbolize(pc + off)}"
+    if fmt == "J":
+        off = _sext((((word >> 31) & 1) << 20) | (((word >> 12) & 0xFF) << 12)
+                    | (((word >> 20) & 1) << 11) | (((word >> 21) & 0x3FF) << 1), 21)
+        return f"{name}\tx{rd},{symbolize(pc + off)}"
+    if fmt == "U":
+        return f"{name}\tx{rd},0x{word >> 12:x}"
+    if fmt == "FENCE":
+        fm = word >> 28
+        pred, succ = (word >> 24) & 0xF, (word >> 20) & 0xF
+        if fm == 0x8 and pred == 0x3 and succ == 0x3:
+            return "fence.tso"
+        return f"{name}\t{_fence_set(pred)},{_fence_set(succ)}"
+    return name
+
+def disassemble_bytes(raw: bytes, base: int = 0, symbols=None):
+    """One objdump-style line per 32-bit word of `raw`, which is loaded at `base`."""
+    symbolize = Symbolizer(symbols)
+    out = []
+    for off in range(0, len(raw) - len(raw) % 4, 4):
+        out.append(disassemble_word(int.from_bytes(raw[off:off + 4], "little"), base + off, symbolize))
+    return out
+
+class Listing(Sequence):
+    """
+    disassemble_bytes() deferred until someone reads a line, so programs
+    that pass and are never printed cost no decoding.
+    """
+    __slots__ = ("_raw", "_base", "_symbols", "_lines")
+
+    def __init__(self, raw: bytes, base: int = 0, symbols=None):
+        self._raw, self._base, self._symbols = raw, base, symbols
+        self._lines = None
+
+    def _decoded(self):
+        if self._lines is None:
+            self._lines = disassemble_bytes(self._raw, self._base, self._symbols)
+        return self._lines
+
+    def __len__(self):
+        return len(self._raw) // 4
+
+    def __getitem__(self, i):
+        return self._decoded()[i]
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        state = "decoded" if self._lines is not None else "pending"
+        return f"Listing({len(self)} insts, {state})"
+
+    def __reduce__(self):
+        if self._lines is not None:
+            return (list, (self._lines,))
+        return (Listing, (self._raw, self._base, self._symbols))
@@ -0,0 +1,238 @@
+import functools
+from collections import namedtuple
+from tests.CPU.riscv_disasm import decode, disassemble_word
+
+# Instruction-set simulator for RV64I + Zifencei: runs an assembled image and
+# gives the architectural end state a test should expect (registers, memory,
+# retired count). Decoding goes through riscv_disasm's tables; each recently
+# seen 32-bit word is decoded once into (handler, rd, rs1, rs2, imm).
+#
+# The decode cache is keyed by instruction *word*, not PC, so stores over
+# code are always seen: fence.i has nothing to flush.
+
+XLEN = 64
+MASK = (1 << XLEN) - 1
+
+IssResult = namedtuple("IssResult", "x memory retired pc halted")
+
+class IssError(RuntimeError):
+    """Illegal instruction or access outside simulated memory."""
+
+def _sext(v, bits):
+    v &= (1 << bits) - 1
+    return v - (1 << bits) if v >> (bits - 1) else v
+
+def _s64(v):
+    return v - (1 << 64) if v >> 63 else v
+
+def _w(v):
+    """Sign-extend the low 32 bits to a 64-bit register value."""
+    return _sext(v, 32) & MASK
+
+# ---------- immediates per format ----------
+def _imm(word, fmt):
+    if fmt in ("I", "L"):
+        return _sext(word >> 20, 12)
+    if fmt == "SH6":
+        return (word >> 20) & 0x3F
+    if fmt == "SH5":
+        return (word >> 20) & 0x1F
+    if fmt == "S":
+        return _sext(((word >> 25) << 5) | ((word >> 7) & 0x1F), 12)
+    if fmt == "B":
+        return _sext((((word >> 31) & 1) << 12) | (((word >> 7) & 1) << 11)
+                     | (((word >> 25) & 0x3F) << 5) | (((word >> 8) & 0xF) << 1), 13)
+    if fmt == "J":
+        return _sext((((word >> 31) & 1) << 20) | (((word >> 12) & 0xFF) << 12)
+                     | (((word >> 20) & 1) << 11) | (((word >> 21) & 0x3FF) << 1), 21)
+    if fmt == "U":
+        return _sext(word & 0xFFFFF000, 32)
+    return 0
+
+# ---------- operation tables ----------
+# 64-bit ALU: (a, b) -> result, both operands unsigned 64-bit
+_ALU = {
+    "add":  lambda a, b: (a + b) & MASK,
+    "sub":  lambda a, b: (a - b) & MASK,
+    "sll":  lambda a, b: (a << (b & 63)) & MASK,
+    "srl":  lambda a, b: a >> (b & 63),
+    "sra":  lambda a, b: (_s64(a) >> (b & 63)) & MASK,
+    "slt":  lambda a, b: int(_s64(a) < _s64(b)),
+    "sltu": lambda a, b: int(a < b),
+    "xor":  lambda a, b: a ^ b,
+    "or":   lambda a, b: a | b,
+    "and":  lambda a, b: a & b,
+}
+# *W forms operate on the low word and sign-extend the 32-bit result
+_ALU_W = {
+    "addw": lambda a, b: _w(a + b),
+    "subw": lambda a, b: _w(a - b),
+    "sllw": lambda a, b: _w(a << (b & 31)),
+    "srlw": lambda a, b: _w((a & 0xFFFFFFFF) >> (b & 31)),
+    "sraw": lambda a, b: _w(_sext(a, 32) >> (b & 31)),
+}
+_IMM_ALIAS = {"addi": "add", "slti": "slt", "sltiu": "sltu", "xori": "xor", "ori": "or",
+              "andi": "and", "slli": "sll", "srli": "srl", "srai": "sra",
+              "addiw": "addw", "slliw": "sllw", "srliw": "srlw", "sraiw": "sraw"}
+# loads: name -> (bytes, signed)
+_LOADS = {"lb": (1, True), "lh": (2, True), "lw": (4, True), "ld": (8, False),
+          "lbu": (1, False), "lhu": (2, False), "lwu": (4, False)}
+_STORES = {"sb": 1, "sh": 2, "sw": 4, "sd": 8}
+_BRANCH = {
+    "beq":  lambda a, b: a == b,
+    "bne":  lambda a, b: a != b,
+    "blt":  lambda a, b: _s64(a) < _s64(b),
+    "bge":  lambda a, b: _s64(a) >= _s64(b),
+    "bltu": lambda a, b: a < b,
+    "bgeu": lambda a, b: a >= b,
+}
+
+# ---------- handlers ----------
+# handler(iss, pc, rd, rs1, rs2, imm) -> next pc
+def _h_reg(fn):
+    def h(s, pc, rd, rs1, rs2, imm):
+        x = s.x
+        x[rd] = fn(x[rs1], x[rs2])
+        return pc + 4
+    return h
+
+def _h_imm(fn):
+    def h(s, pc, rd, rs1, rs2, imm):
+        x = s.x
+        x[rd] = fn(x[rs1], imm & MASK)
+        return pc + 4
+    return h
+
+def _h_load(n, signed):
+    def h(s, pc, rd, rs1, rs2, imm):
+        v = int.from_bytes(s.load(s.x[rs1] + imm, n), "little")
+        s.x[rd] = (_sext(v, 8 * n) & MASK) if signed else v
+        return pc + 4
+    return h
+
+def _h_store(n):
+    def h(s, pc, rd, rs1, rs2, imm):
+        s.store(s.x[rs1] + imm, (s.x[rs2] & ((1 << (8 * n)) - 1)).to_bytes(n, "little"))
+        return pc + 4
+    return h
+
+def _h_branch(cond):
+    def h(s, pc, rd, rs1, rs2, imm):
+        return pc + imm if cond(s.x[rs1], s.x[rs2]) else pc + 4
+    return h
+
+def _h_jal(s, pc, rd, rs1, rs2, imm):
+    s.x[rd] = (pc + 4) & MASK
+    return pc + imm
+
+def _h_jalr(s, pc, rd, rs1, rs2, imm):
+    target = (s.x[rs1] + imm) & MASK & ~1
+    s.x[rd] = (pc + 4) & MASK
+    return target
+
+def _h_lui(s, pc, rd, rs1, rs2, imm):
+    s.x[rd] = imm & MASK
+    return pc + 4
+
+def _h_auipc(s, pc, rd, rs1, rs2, imm):
+    s.x[rd] = (pc + imm) & MASK
+    return pc + 4
+
+def _h_nop(s, pc, rd, rs1, rs2, imm):
+    return pc + 4
+
+def _h_halt(s, pc, rd, rs1, rs2, imm):
+    s.halted = True
+    return pc + 4
+
+HANDLERS = {"jal": _h_jal, "jalr": _h_jalr, "lui": _h_lui, "auipc": _h_auipc,
+            "fence": _h_nop, "fence.i": _h_nop, "ecall": _h_halt, "ebreak": _h_halt}
+HANDLERS.update({n: _h_reg(f) for n, f in {**_ALU, **_ALU_W}.items()})
+HANDLERS.update({n: _h_imm({**_ALU, **_ALU_W}[base]) for n, base in _IMM_ALIAS.items()})
+HANDLERS.update({n: _h_load(*spec) for n, spec in _LOADS.items()})
+HANDLERS.update({n: _h_store(w) for n, w in _STORES.items()})
+HANDLERS.update({n: _h_branch(c) for n, c in _BRANCH.items()})
+
+# word -> (handler, rd, rs1, rs2, imm); shared, words decode the same everywhere.
+# Bounded: random immediates make most fuzz words unique, and the simulator
+# process lives for the whole regression.
+DECODE_CACHE_SIZE = 8192
+
+@functools.lru_cache(maxsize=DECODE_CACHE_SIZE)
+def decode_op(word):
+    hit = decode(word)
+    if hit is None:
+        raise IssError(f"illegal instruction 0x{word:08x}")
+    name, fmt = hit
+    return (HANDLERS[name], (word >> 7) & 31, (word >> 15) & 31, (word >> 20) & 31, _imm(word, fmt))
+
+class Iss:
+    """
+    One hart over a flat little-endian memory of `mem_size` bytes at address
+    0. `image` is placed at `base`. ecall/ebreak halt; the halting
+    instruction counts as retired.
+    """
+    def __init__(self, image=b"", mem_size=4096, base=0, pc=None):
+        self.memory = bytearray(mem_size)
+        self.memory[base:base + len(image)] = image
+        self.x = [0] * 32
+        self.pc = base if pc is None else pc
+        self.retired = 0
+        self.halted = False
+
+    def _span(self, addr, n):
+        addr &= MASK
+        if addr + n > len(self.memory):
+            raise IssError(f"access of {n} bytes at 0x{addr:x} outside memory "
+                           f"(pc 0x{self.pc:x}: {disassemble_word(self.fetch(), self.pc)})")
+        return addr
+
+    def load(self, addr, n) -> bytes:
+        a = self._span(addr, n)
+        return bytes(self.memory[a:a + n])
+
+    def store(self, addr, data):
+        a = self._span(addr, len(data))
+        self.memory[a:a + len(data)] = data
+
+    def fetch(self) -> int:
+        pc = self.pc
+        if pc & 3 or pc + 4 > len(self.memory):
+            raise IssError(f"fetch from 0x{pc:x}")
+        return int.from_bytes(self.memory[pc:pc + 4], "little")
+
+    def step(self):
+        """Execute one instruction; returns the word that retired."""
+        word = self.fetch()
+        fn, rd, rs1, rs2, imm = decode_op(word)
+        self.pc = fn(self, self.pc, rd, rs1, rs2, imm) & MASK
+        self.x[0] = 0
+        self.retired += 1
+        return word
+
+    def run(self, max_steps=1_000_000):
+        """Step until ecall/ebreak; IssError if that takes more than `max_steps`."""
+        x, mem, pc = self.x, self.memory, self.pc
+        steps = 0
+        try:
+            while not self.halted:
+                if steps == max_steps:
+                    raise IssError(f"no ecall within {max_steps} instructions (pc 0x{pc:x})")
+                if pc & 3 or pc + 4 > len(mem):
+                    raise IssError(f"fetch from 0x{pc:x}")
+                fn, rd, rs1, rs2, imm = decode_op(int.from_bytes(mem[pc:pc + 4], "little"))
+                self.pc = pc
+                pc = fn(self, pc, rd, rs1, rs2, imm) & MASK
+                x[0] = 0
+                steps += 1
+        finally:
+            self.pc = pc
+            self.retired += steps
+        return self.result()
+
+    def result(self) -> IssResult:
+        return IssResult(list(self.x), bytes(self.memory), self.retired, self.pc, self.halted)
+
+def run_program(image: bytes, mem_size=4096, base=0, max_steps=1_000_000) -> IssResult:
+    """Execute `image` (e.g. AssembledProgram.raw) from `base` to its ecall."""
+    return Iss(image, mem_size, base).run(max_steps)
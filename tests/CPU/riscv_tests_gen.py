@@ -3,11 +3,45 @@ import subprocess
 import tempfile
 import textwrap
 import re
+import hashlib
+import pickle
+import fcntl
+import functools
+import contextlib
+import logging
+import itertools
+import multiprocessing
+from collections import namedtuple, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from tests.CPU.elf_utils import ElfFile, link_flat, UnsupportedLink
+from tests.CPU import riscv_asm
+from tests.CPU.riscv_disasm import disassemble_bytes, Listing
 
 AS = "riscv64-unknown-elf-as"
 LD = "riscv64-unknown-elf-ld"
 OBJCOPY = "riscv64-unknown-elf-objcopy"
 OBJDUMP = "riscv64-unknown-elf-objdump"
+MARCH = "rv64i_zifencei"
+
+# On-disk assembly cache. Set RISCV_ASM_CACHE=0 to bypass it entirely.
+ASM_CACHE_ENABLED = os.environ.get("RISCV_ASM_CACHE", "1") != "0"
+ASM_CACHE_DIR = os.environ.get(
+    "RISCV_ASM_CACHE_DIR",
+    os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "rv_asm_cache"),
+)
+ASM_CACHE_MAX_BYTES = int(os.environ.get("RISCV_ASM_CACHE_MB", "64")) * 1024 * 1024
+ASM_CACHE_EVICT_EVERY = 64  # puts between size checks
+
+# Which assembler to use:
+#   auto   - in-process riscv_asm when it supports the source, binutils otherwise
+#   python - riscv_asm only (unsupported source is an error)
+#   gnu    - binutils only
+ASM_BACKEND = os.environ.get("RISCV_ASM_BACKEND", "auto")
+
+# Worker processes preparing (generating + assembling) programs ahead of the
+# simulator; 0 = prepare inline in the test process
+PREP_WORKERS = int(os.environ.get("RISCV_PREP_WORKERS", max(1, min(4, (os.cpu_count() or 2) - 1))))
 
 RED   = "\033[31m"
 BLUE  = "\033[34m"
@@ -15,85 +49,233 @@ GRAY  = "\033[90m"
 RESET = "\033[0m"
 SEP = GRAY + "|" + RESET  # light-gray vertical bar
 
-# ---------- assembler helpers ----------
-def assemble_rv32i_bytes(asm: str) -> bytes:
-    """Assemble RV32I asm -> raw little-endian bytes (no visible temp files)."""
-    src = textwrap.dedent(f""".text
-{asm}
-""").encode()
+# ---------- assembly cache ----------
+@functools.lru_cache(maxsize=None)
+def toolchain_version() -> str:
+    """First line of `as --version`; part of every cache key."""
+    p = subprocess.run([AS, "--version"], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                       text=True, check=False)
+    if p.returncode != 0:
+        raise RuntimeError(f"'as --version' failed:\n{p.stderr}")
+    return p.stdout.splitlines()[0].strip()
 
-    with tempfile.TemporaryFile() as obj_fd, tempfile.TemporaryFile() as linked_fd, tempfile.TemporaryFile() as bin_fd:
-        obj_no, linked_no, bin_no = obj_fd.fileno(), linked_fd.fileno(), bin_fd.fileno()
-        obj_path, linked_path, bin_path = f"/dev/fd/{obj_no}", f"/dev/fd/{linked_no}", f"/dev/fd/{bin_no}"
+class AsmCache:
+    """
+    Content-addressed store of assembled programs, shared across runs and processes.
+    One file per key holding {"raw": bytes, "mnemonics": Listing, "symbols": dict}:
+      - an undecoded Listing pickles as (raw, base, symbols) and comes back
+        undecoded, so a hit costs no disassembly until diagnostics read it
+      - key = sha256(toolchain version, -march, asm text)
+      - writes go to a temp file + os.replace, so readers never see partial entries
+      - hits bump the file mtime; eviction drops the oldest files once the
+        directory exceeds max_bytes (LRU by mtime, under an flock)
+    """
+    def __init__(self, root=ASM_CACHE_DIR, max_bytes=ASM_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._puts = 0
+        os.makedirs(self.root, exist_ok=True)
 
-        # as -> ELF object into obj_fd
-        p_as = subprocess.run([AS, "-march=rv64i_zifencei", "-o", obj_path, "-"],
-                              input=src, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                              check=False, pass_fds=(obj_no,))
-        if p_as.returncode != 0:
-            raise RuntimeError(f"'as' failed:\n{p_as.stderr.decode(errors='ignore')}")
-        os.lseek(obj_no, 0, os.SEEK_SET)
+    def key(self, asm: str, march: str = MARCH) -> str:
+        h = hashlib.sha256()
+        for part in (toolchain_version(), march, asm):
+            h.update(part.encode())
+            h.update(b"\0")
+        return h.hexdigest()
 
-        # ld -> linked ELF into linked_fd
-        p_ld = subprocess.run([LD, "-Ttext=0x0", "--entry=0x0", "-o", linked_path, obj_path],
-                              stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                              check=False, pass_fds=(obj_no, linked_no))
-        if p_ld.returncode != 0:
-            raise RuntimeError(f"'ld' failed:\n{p_ld.stderr.decode(errors='ignore')}")
-        os.lseek(linked_no, 0, os.SEEK_SET)
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key + ".pkl")
+
+    def get(self, key) -> dict:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return {}
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass  # evicted by another process between read and touch
+        return entry
 
-        # objcopy -> raw binary into bin_fd
-        p_oc = subprocess.run([OBJCOPY, "-O", "binary", linked_path, bin_path],
-                              stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                              check=False, pass_fds=(linked_no, bin_no))
-        if p_oc.returncode != 0:
-            raise RuntimeError(f"'objcopy' failed:\n{p_oc.stderr.decode(errors='ignore')}")
-        os.lseek(bin_no, 0, os.SEEK_SET)
-        raw = bin_fd.read()
+    def put(self, key, **fields):
+        """Merge `fields` into the entry for `key` (later writers win per field)."""
+        entry = self.get(key)
+        entry.update(fields)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+        self._puts += 1
+        if self._puts % ASM_CACHE_EVICT_EVERY == 1:
+            self.evict()
 
-    return raw
+    def evict(self):
+        """Drop least-recently-used entries until the cache fits in max_bytes."""
+        with open(os.path.join(self.root, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            files = []
+            total = 0
+            for dirpath, _, names in os.walk(self.root):
+                for n in names:
+                    if not n.endswith(".pkl"):
+                        continue
+                    p = os.path.join(dirpath, n)
+                    try:
+                        st = os.stat(p)
+                    except FileNotFoundError:
+                        continue
+                    files.append((st.st_mtime, st.st_size, p))
+                    total += st.st_size
+            if total <= self.max_bytes:
+                return
+            files.sort()
+            for _, size, p in files:
+                try:
+                    os.unlink(p)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+_asm_cache = None
+
+def get_asm_cache():
+    """Process-wide AsmCache, or None when caching is disabled."""
+    global _asm_cache
+    if not ASM_CACHE_ENABLED:
+        return None
+    if _asm_cache is None:
+        _asm_cache = AsmCache()
+    return _asm_cache
+
+# ---------- assembler helpers ----------
+# raw: flat image at address 0, mnemonics: objdump text per instruction,
+# symbols: label name -> address
+AssembledProgram = namedtuple("AssembledProgram", "raw mnemonics symbols")
+
+def _assemble_in_process(asm: str):
+    """AssembledProgram from riscv_asm, or None when binutils should handle it."""
+    if ASM_BACKEND == "gnu":
+        return None
+    try:
+        return AssembledProgram(*riscv_asm.assemble(asm))
+    except riscv_asm.UnsupportedAsm:
+        if ASM_BACKEND == "python":
+            raise
+        return None
+
+def assemble_rv32i(asm: str) -> AssembledProgram:
+    """
+    Assemble at address 0. In-process when possible; otherwise a single `as`
+    run whose object is relocated and disassembled in Python (cached on
+    disk).
+    """
+    prog = _assemble_in_process(asm)
+    if prog is not None:
+        return prog
+    cache = get_asm_cache()
+    if cache is None:
+        return _assemble_rv32i_uncached(asm)
+    key = cache.key(asm)
+    entry = cache.get(key)
+    if "raw" in entry and "mnemonics" in entry and "symbols" in entry:
+        return AssembledProgram(entry["raw"], entry["mnemonics"], entry["symbols"])
+    prog = _assemble_rv32i_uncached(asm)
+    cache.put(key, raw=prog.raw, mnemonics=prog.mnemonics, symbols=prog.symbols)
+    return prog
+
+def assemble_rv32i_bytes(asm: str) -> bytes:
+    """Assemble RV32I asm -> raw little-endian bytes."""
+    return assemble_rv32i(asm).raw
 
 def disassemble_rv32i(asm: str):
+    """Return a list of 'mnemonic operands' strings for the given asm snippet."""
+    return assemble_rv32i(asm).mnemonics
+
+def _run_tool(name, argv, **kwargs):
+    p = subprocess.run(argv, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False, **kwargs)
+    if p.returncode != 0:
+        err = p.stderr if isinstance(p.stderr, str) else p.stderr.decode(errors="ignore")
+        raise RuntimeError(f"'{name}' failed:\n{err}")
+    return p
+
+@contextlib.contextmanager
+def _scratch_file(name):
+    """Anonymous in-memory file (memfd) that child tools can use as /dev/fd/N."""
+    if hasattr(os, "memfd_create"):
+        f = os.fdopen(os.memfd_create(name), "w+b")
+    else:
+        f = tempfile.TemporaryFile()
+    with f:
+        yield f
+
+def _as_object(src: bytes) -> ElfFile:
+    """Run `as` alone; the relocatable object never touches the filesystem."""
+    with _scratch_file("rv_obj") as obj_fd:
+        obj_no = obj_fd.fileno()
+        # -mno-relax: nothing for a linker to shrink, so link_flat's layout is final
+        _run_tool("as", [AS, f"-march={MARCH}", "-mno-relax", "-o", f"/dev/fd/{obj_no}", "-"],
+                  input=src, pass_fds=(obj_no,))
+        obj_fd.seek(0)
+        return ElfFile(obj_fd.read())
+
+def _assemble_rv32i_uncached(asm: str) -> AssembledProgram:
     """
-    Return a list of 'mnemonic operands' strings for the given asm snippet.
-    Uses objdump with:
-      --no-show-raw-insn   (hide raw bytes so parsing is easy)
-      -M numeric           (use x0..x31, not ABI names)
-      -M no-aliases        (avoid pseudoinstructions)
+    `as` only: the object's .text is relocated in-process (elf_utils.link_flat)
+    and disassembled in-process. Falls back to the ld/objdump pipeline for
+    objects link_flat does not handle.
     """
     src = textwrap.dedent(f""".text
 {asm}
 """).encode()
+    try:
+        raw, symbols = link_flat(_as_object(src))
+    except UnsupportedLink:
+        return _assemble_rv32i_linked(src)
+    return AssembledProgram(raw, Listing(raw, 0, symbols), symbols)
 
-    with tempfile.TemporaryFile() as obj_fd, tempfile.TemporaryFile() as linked_fd:
+def _assemble_rv32i_linked(src: bytes) -> AssembledProgram:
+    """
+    as -> ld -> objdump, three processes in total (no visible temp files).
+    The flat image and symbol table are read straight out of the linked ELF;
+    objdump only supplies mnemonics, using:
+      --no-show-raw-insn   (hide raw bytes so parsing is easy)
+      -M numeric           (use x0..x31, not ABI names)
+      -M no-aliases        (avoid pseudoinstructions)
+      -z                   (list zero words too, so mnemonics[i] is word i)
+    """
+    with _scratch_file("rv_obj") as obj_fd, _scratch_file("rv_elf") as linked_fd:
         obj_no, linked_no = obj_fd.fileno(), linked_fd.fileno()
         obj_path, linked_path = f"/dev/fd/{obj_no}", f"/dev/fd/{linked_no}"
 
-        p_as = subprocess.run(
-            [AS, "-march=rv64i_zifencei", "-o", obj_path, "-"],
-            input=src, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-            check=False, pass_fds=(obj_no,)
-        )
-        if p_as.returncode != 0:
-            raise RuntimeError(f"'as' failed:\n{p_as.stderr.decode(errors='ignore')}")
+        # as -> ELF object into obj_fd
+        _run_tool("as", [AS, f"-march={MARCH}", "-mno-relax", "-o", obj_path, "-"],
+                  input=src, pass_fds=(obj_no,))
         os.lseek(obj_no, 0, os.SEEK_SET)
 
-        # ld -> linked ELF into linked_fd
-        p_ld = subprocess.run([LD, "-Ttext=0x0", "--entry=0x0", "-o", linked_path, obj_path],
-                              stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                              check=False, pass_fds=(obj_no, linked_no))
-        if p_ld.returncode != 0:
-            raise RuntimeError(f"'ld' failed:\n{p_ld.stderr.decode(errors='ignore')}")
+        # ld -> linked ELF into linked_fd; no relaxation, so the bytes match link_flat's
+        _run_tool("ld", [LD, "-Ttext=0x0", "--entry=0x0", "--no-relax", "-o", linked_path, obj_path],
+                  pass_fds=(obj_no, linked_no))
         os.lseek(linked_no, 0, os.SEEK_SET)
 
         # IMPORTANT: numeric regs + no-aliases for exact xN names
-        p_od = subprocess.run(
-            [OBJDUMP, "-d", "--no-show-raw-insn", "-M", "numeric,no-aliases", linked_path],
-            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-            text=True, check=False, pass_fds=(linked_no,)
-        )
-        if p_od.returncode != 0:
-            raise RuntimeError(f"'objdump' failed:\n{p_od.stderr}")
+        p_od = _run_tool("objdump",
+                         [OBJDUMP, "-d", "-z", "--no-show-raw-insn", "-M", "numeric,no-aliases", linked_path],
+                         text=True, pass_fds=(linked_no,))
+        linked_fd.seek(0)
+        elf = ElfFile(linked_fd.read())
 
     mnems = []
     line_re = re.compile(r"^\s*[0-9A-Fa-f]+:\s*(.+)$")
@@ -103,8 +285,188 @@ def disassemble_rv32i(asm: str):
             insn = m.group(1).strip()
             if insn:
                 mnems.append(insn)
-    return mnems
+    return AssembledProgram(elf.flat_image(), mnems, elf.symbol_table())
+
+
+def assemble_rv32i_batch(asms) -> list:
+    """
+    Assemble many independent programs with a single as/ld pass.
+    Each program goes into its own `.text.batch_N` section bracketed by
+    start/end symbols; the linked image is then split back into one
+    AssembledProgram per input, rebased to address 0. Branches, jal and
+    auipc/%pcrel_* are PC-relative, so the bytes match a standalone build.
+    Labels share one namespace, so they must be unique across the batch
+    (numeric local labels are fine as long as each `1b`/`1f` resolves
+    inside its own program). Programs the in-process assembler handles and
+    cache hits are served per program; only the rest go through binutils.
+    """
+    asms = list(asms)
+    out = [_assemble_in_process(a) for a in asms]
+    cache = get_asm_cache()
+    keys = [cache.key(a) if cache is not None and out[i] is None else None
+            for i, a in enumerate(asms)]
+    misses = []
+    for i, (asm, key) in enumerate(zip(asms, keys)):
+        if out[i] is not None:
+            continue
+        if cache is not None:
+            entry = cache.get(key)
+            if "raw" in entry and "mnemonics" in entry and "symbols" in entry:
+                out[i] = AssembledProgram(entry["raw"], entry["mnemonics"], entry["symbols"])
+                continue
+        misses.append(i)
+
+    if len(misses) == 1:
+        out[misses[0]] = _assemble_rv32i_uncached(asms[misses[0]])
+    elif misses:
+        try:
+            progs = _assemble_rv32i_batch_uncached([asms[i] for i in misses])
+        except RuntimeError:
+            # One bad program fails the whole batch; redo them one by one so the
+            # error names the culprit (and the good ones still get cached).
+            progs = [_assemble_rv32i_uncached(asms[i]) for i in misses]
+        for i, prog in zip(misses, progs):
+            out[i] = prog
+
+    if cache is not None:
+        for i in misses:
+            cache.put(keys[i], raw=out[i].raw, mnemonics=out[i].mnemonics, symbols=out[i].symbols)
+    return out
+
+def _assemble_rv32i_batch_uncached(asms) -> list:
+    src = _batch_source(asms)
+    obj = _as_object(src)
+    try:
+        image, addrs = link_flat(obj)
+    except UnsupportedLink:
+        return _assemble_rv32i_batch_linked(asms, src)
+
+    labels = _batch_labels(obj, addrs, len(asms))
+    progs = []
+    for n in range(len(asms)):
+        start, end = addrs[f"__batch_start_{n}"], addrs[f"__batch_end_{n}"]
+        raw = image[start:end]
+        syms = {name: a - start for name, a in labels[n].items()}
+        progs.append(AssembledProgram(raw, Listing(raw, 0, syms), syms))
+    return progs
+
+def _batch_source(asms) -> bytes:
+    parts = []
+    for n, asm in enumerate(asms):
+        parts.append(f""".section .text.batch_{n},"ax",@progbits
+.balign 4
+__batch_start_{n}:
+{asm}
+__batch_end_{n}:
+""")
+    return "".join(parts).encode()
+
+def _batch_labels(obj, addrs, count):
+    """Per-program {label: address}: the object file still has one section per program."""
+    owner = {}
+    for idx, sec in enumerate(obj.sections):
+        if sec.name.startswith(".text.batch_"):
+            owner[idx] = int(sec.name[len(".text.batch_"):])
+    labels = [dict() for _ in range(count)]
+    for sym in obj.symbols():
+        n = owner.get(sym.shndx)
+        if n is None or sym.name not in addrs or sym.name.startswith("__batch_"):
+            continue
+        labels[n][sym.name] = addrs[sym.name]
+    return labels
+
+def _assemble_rv32i_batch_linked(asms, src) -> list:
+    with _scratch_file("rv_obj") as obj_fd, _scratch_file("rv_elf") as linked_fd:
+        obj_no, linked_no = obj_fd.fileno(), linked_fd.fileno()
+        obj_path, linked_path = f"/dev/fd/{obj_no}", f"/dev/fd/{linked_no}"
+
+        # -mno-relax / --no-relax: relaxation could turn auipc+%pcrel_lo pairs
+        # into x0/gp-relative forms holding batch addresses, which would not
+        # survive rebasing each program to 0
+        _run_tool("as", [AS, f"-march={MARCH}", "-mno-relax", "-o", obj_path, "-"],
+                  input=src, pass_fds=(obj_no,))
+        os.lseek(obj_no, 0, os.SEEK_SET)
+
+        _run_tool("ld", [LD, "-Ttext=0x0", "--entry=0x0", "--no-relax", "-o", linked_path, obj_path],
+                  pass_fds=(obj_no, linked_no))
+        obj_fd.seek(0)
+        obj = ElfFile(obj_fd.read())
+        linked_fd.seek(0)
+        elf = ElfFile(linked_fd.read())
 
+    addrs = elf.symbol_table()
+    labels = _batch_labels(obj, addrs, len(asms))
+    image = elf.flat_image()
+    text_base = elf.section(".text").addr
+    progs = []
+    for n in range(len(asms)):
+        start, end = addrs[f"__batch_start_{n}"], addrs[f"__batch_end_{n}"]
+        raw = image[start - text_base:end - text_base]
+        syms = {name: a - start for name, a in labels[n].items()}
+        # listed from the rebased bytes, so it reads like (and caches as) a standalone build
+        progs.append(AssembledProgram(raw, Listing(raw, 0, syms), syms))
+    return progs
+
+# ---------- IR programs ----------
+def assemble_program(insts) -> AssembledProgram:
+    """Lower a list of riscv_asm.Inst straight to bytes (text only on the binutils path)."""
+    return assemble_programs([insts])[0]
+
+def assemble_programs(programs) -> list:
+    """
+    Lower many IR programs. The in-process encoder handles them directly;
+    with RISCV_ASM_BACKEND=gnu (or anything it rejects) they are rendered
+    to text and go through assemble_rv32i_batch.
+    """
+    out = [None] * len(programs)
+    if ASM_BACKEND != "gnu":
+        for i, insts in enumerate(programs):
+            try:
+                out[i] = AssembledProgram(*riscv_asm.lower(insts))
+            except riscv_asm.UnsupportedAsm:
+                if ASM_BACKEND == "python":
+                    raise
+    rest = [i for i, p in enumerate(out) if p is None]
+    if rest:
+        for i, prog in zip(rest, assemble_rv32i_batch([riscv_asm.render(programs[i]) for i in rest])):
+            out[i] = prog
+    return out
+
+# ---------- pipelined preparation ----------
+def prefetch_map(fn, items, *, workers=None, depth=None):
+    """
+    Yield fn(item) for each item, in order, while up to `depth` later items
+    are being prepared in a process pool. A test that awaits the simulator
+    between pulls keeps the pool busy, so a campaign costs about
+    max(sim, prep) instead of sim + prep. `fn` and its results must pickle
+    (module-level function, plain data). Workers come from a forkserver,
+    never a fork of the simulator process, whose model may run threads.
+    """
+    workers = PREP_WORKERS if workers is None else workers
+    items = iter(items)
+    if workers <= 0:
+        for item in items:
+            yield fn(item)
+        return
+    depth = depth or 2 * workers
+    ctx = multiprocessing.get_context("forkserver")
+    python = os.environ.get("PYGPI_PYTHON_BIN")   # sys.executable is the simulator under cocotb
+    if python:
+        ctx.set_executable(python)
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx)
+    try:
+        pending = deque(pool.submit(fn, item) for item in itertools.islice(items, depth))
+        while pending:
+            fut = pending.popleft()
+            for item in itertools.islice(items, 1):
+                pending.append(pool.submit(fn, item))
+            yield fut.result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def chunked(seq, size):
+    """Consecutive slices of `seq` of at most `size` elements."""
+    return [seq[i:i + size] for i in range(0, len(seq), size)]
 
 # ---------- bit grid printing ----------
 def header_rows_32():
@@ -120,24 +482,14 @@ def with_separators(s: str) -> str:
 def grid_line():
     return GRAY + "".join("-|" for _ in range(31)) + "-" + RESET
 
-def log_bit_grid(dut, raw: bytes, mnemonics=None):
-    tens, ones = header_rows_32()
-    dut._log.debug("  " + with_separators(tens))
-    dut._log.debug("  " + with_separators(ones))
-    dut._log.debug("  " + grid_line())
-    for idx in range(0, len(raw), 4):
-        w = raw[idx:idx+4]
-        u32 = int.from_bytes(w, "little")
-        bits = f"{u32:032b}"
-        mnemonic = ""
-        if mnemonics and idx//4 < len(mnemonics):
-            mnemonic = f"  {BLUE}{mnemonics[idx//4]}{RESET}"
-        dut._log.debug("  " + with_separators(bits) + f"   {RED}inst{idx//4}{RESET}{mnemonic}")
-def print_bit_grid(raw: bytes, mnemonics=None):
+def bit_grid_lines(raw: bytes, mnemonics=None, base: int = 0):
+    """Header + one colored row per 32-bit word; mnemonics default to the in-process disassembler."""
+    if mnemonics is None:
+        mnemonics = Listing(raw, base)
     tens, ones = header_rows_32()
-    print("  " + with_separators(tens))
-    print("  " + with_separators(ones))
-    print("  " + grid_line())
+    yield "  " + with_separators(tens)
+    yield "  " + with_separators(ones)
+    yield "  " + grid_line()
     for idx in range(0, len(raw), 4):
         w = raw[idx:idx+4]
         u32 = int.from_bytes(w, "little")
@@ -145,7 +497,18 @@ def print_bit_grid(raw: bytes, mnemonics=None):
         mnemonic = ""
         if mnemonics and idx//4 < len(mnemonics):
             mnemonic = f"  {BLUE}{mnemonics[idx//4]}{RESET}"
-        print("  " + with_separators(bits) + f"   {RED}inst{idx//4}{RESET}{mnemonic}")
+        yield "  " + with_separators(bits) + f"   {RED}inst{idx//4}{RESET}{mnemonic}"
+
+def log_bit_grid(dut, raw: bytes, mnemonics=None, base: int = 0, level=logging.DEBUG):
+    """Log `raw` as a bit grid; nothing is formatted unless the logger is enabled for `level`."""
+    if not dut._log.isEnabledFor(level):
+        return
+    for line in bit_grid_lines(raw, mnemonics, base):
+        dut._log.log(level, line)
+
+def print_bit_grid(raw: bytes, mnemonics=None, base: int = 0):
+    for line in bit_grid_lines(raw, mnemonics, base):
+        print(line)
 # --- demo ---
 if __name__ == "__main__":
     asm = """
@@ -161,6 +524,6 @@ target:
         addi  x7, x7, 3
         ecall
     """
-    raw = assemble_rv32i_bytes(asm)
-    mnemonics = disassemble_rv32i(asm)
-    print_bit_grid(raw, mnemonics)
+    prog = assemble_rv32i(asm)
+    print_bit_grid(prog.raw, prog.mnemonics)
+    print(prog.symbols)
@@ -0,0 +1,90 @@
+"""
+Compare simulator throughput across Verilator thread counts.
+
+    python3 -m tests.CPU.run_bench --threads 1,2,4 --mode long,short
+
+For each thread count a model is built (1: PROFILE=fast, N > 1: PROFILE=mt
+MT_THREADS=N; both are cached, see model_cache.py). Each mode of
+tests.CPU.bench_throughput then runs --repeat times in bench/threads_<N>/.
+The best cycles/s per (threads, mode) is printed as a table, together with
+the speedup over one thread. Long runs favour more threads. Many short fuzz
+programs usually do better with one thread per process and more shards
+(run_sharded -j).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from tests.CPU.run_sharded import ROOT, _make, _run_dir
+
+def _profile(threads):
+    return ["PROFILE=fast"] if threads == 1 else ["PROFILE=mt", f"MT_THREADS={threads}"]
+
+def bench(threads, mode, out_dir, extra, env_extra):
+    """Best-of result dict for one run of bench_throughput, or None if it failed."""
+    d = os.path.join(out_dir, f"threads_{threads}")
+    out = os.path.join(d, f"{mode}.jsonl")
+    env = _run_dir(d, RISCV_BENCH_MODE=mode, RISCV_BENCH_OUT=out, **env_extra)
+    with open(os.path.join(d, f"{mode}.log"), "a") as log:
+        p = _make(["results.xml", "COCOTB_TEST_MODULES=tests.CPU.bench_throughput"] + _profile(threads) + extra,
+                  d, env, log)
+        p.wait()
+    if not os.path.exists(out):
+        return None
+    with open(out) as f:
+        runs = [json.loads(line) for line in f]
+    return max(runs, key=lambda r: r["cycles_per_s"]) if runs else None
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--threads", default="1,2,4", help="comma-separated Verilator --threads counts")
+    ap.add_argument("--mode", default="long,short", help="bench_throughput modes: long, short")
+    ap.add_argument("--repeat", type=int, default=3, help="runs per point; the best is reported")
+    ap.add_argument("--iters", type=int, help="RISCV_BENCH_ITERS for long mode")
+    ap.add_argument("--programs", type=int, help="RISCV_BENCH_PROGRAMS for short mode")
+    ap.add_argument("--elf", help="firmware ELF for long mode instead of the built-in loop")
+    ap.add_argument("-o", "--out", default=os.path.join(ROOT, "bench"))
+    ap.add_argument("make_args", nargs="*", help="extra VAR=value arguments for make")
+    args = ap.parse_args(argv)
+
+    threads = [int(t) for t in args.threads.split(",")]
+    modes = args.mode.split(",")
+    env_extra = {}
+    if args.iters:
+        env_extra["RISCV_BENCH_ITERS"] = str(args.iters)
+    if args.programs:
+        env_extra["RISCV_BENCH_PROGRAMS"] = str(args.programs)
+    if args.elf:
+        env_extra["RISCV_BENCH_ELF"] = os.path.abspath(args.elf)
+    out_dir = os.path.abspath(args.out)
+
+    results = {}
+    for t in threads:
+        t0 = time.time()
+        if _make(["model"] + _profile(t) + args.make_args, ROOT, os.environ.copy()).wait() != 0:
+            print(f"threads={t}: model build failed")
+            continue
+        print(f"threads={t}: model ready in {time.time() - t0:.1f}s")
+        for mode in modes:
+            for stale in [os.path.join(out_dir, f"threads_{t}", f"{mode}.{ext}") for ext in ("jsonl", "log")]:
+                if os.path.exists(stale):
+                    os.remove(stale)
+            for _ in range(args.repeat):
+                r = bench(t, mode, out_dir, args.make_args, env_extra)
+            results[t, mode] = r
+
+    print(f"{'threads':>7}  {'mode':<6} {'cycles':>12} {'wall s':>8} {'cycles/s':>12} {'vs 1T':>6}")
+    for t in threads:
+        for mode in modes:
+            r = results.get((t, mode))
+            if r is None:
+                print(f"{t:>7}  {mode:<6} {'failed':>12}")
+                continue
+            base = results.get((1, mode))
+            speedup = f"{r['cycles_per_s'] / base['cycles_per_s']:.2f}x" if base and base["cycles_per_s"] else "-"
+            print(f"{t:>7}  {mode:<6} {r['cycles']:>12} {r['wall_s']:>8.2f} {r['cycles_per_s']:>12,} {speedup:>6}")
+    return 0 if all(results.get((t, m)) for t in threads for m in modes) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+Run a fuzz test module as N simulator processes over one compiled model.
+
+    python3 -m tests.CPU.run_sharded tests.CPU.random.random_with_mem -j 8
+
+The model is built once (make model). Then shard k of N runs in
+sharded/<module>/shard_<k>/ with RISCV_SHARD=k/N, so each process covers
+its own slice of the program indices (see shardRange() in test_helpers).
+Per-shard results.xml files are merged into sharded/<module>/results.xml,
+logs into sim.log. The failing (seed, index) pairs the shards recorded are
+printed, and the exit status is nonzero if any shard failed.
+
+Campaigns run on the untraced "fast" build. Each failing program is then
+re-run alone (RISCV_FUZZ_INDEX, RISCV_FUZZ_SEED) on the "traced" build, and
+only its waveform is kept, as replay_<seed>_<index>.fst. `--replay INDEX`
+does just that step. With `--window PRE:POST` the replay uses the "window"
+build instead and traces only PRE cycles before the cycle the failure was
+seen at (recorded by the shard, or `--at CYCLE`) and POST after it.
+"""
+import argparse
+import glob
+import os
+import shutil
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def _make(args, cwd, env, log=None):
+    cmd = ["make", "-f", os.path.join(ROOT, "Makefile")] + args
+    return subprocess.Popen(cmd, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT if log else None)
+
+def _profile_args(profile, sim_build):
+    return [f"PROFILE={profile}"] + ([f"SIM_BUILD={sim_build}"] if sim_build else [])
+
+def build_model(profile, sim_build, extra):
+    p = _make(["model"] + _profile_args(profile, sim_build) + extra, ROOT, os.environ.copy())
+    if p.wait() != 0:
+        sys.exit(f"model build failed ({p.returncode})")
+
+def _run_dir(d, **env):
+    """Fresh per-process run directory; returns the environment to run it with."""
+    os.makedirs(d, exist_ok=True)
+    fw = os.path.join(d, "firmware")   # bram_over_axi's DO_INIT reads firmware/build relative to cwd
+    if not os.path.lexists(fw):
+        os.symlink(os.path.join(ROOT, "firmware"), fw)
+    for stale in ("results.xml", "failures.tsv", "dump.fst", "dump.vcd"):
+        if os.path.exists(os.path.join(d, stale)):
+            os.remove(os.path.join(d, stale))
+    return dict(os.environ,
+                RISCV_FAILURE_LOG=os.path.join(d, "failures.tsv"),
+                PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])),
+                **env)
+
+def run_shards(module, shards, out_dir, profile, sim_build, extra, prep_workers, seed=None):
+    procs = []
+    for k in range(shards):
+        d = os.path.join(out_dir, f"shard_{k}")
+        env = _run_dir(d, RISCV_SHARD=f"{k}/{shards}", RISCV_PREP_WORKERS=str(prep_workers))
+        if seed is not None:
+            env["RISCV_FUZZ_SEED"] = seed
+        log = open(os.path.join(d, "sim.log"), "w")
+        p = _make(["results.xml", f"COCOTB_TEST_MODULES={module}"] + _profile_args(profile, sim_build) + extra,
+                  d, env, log)
+        procs.append((k, d, p, log))
+    codes = {}
+    for k, d, p, log in procs:
+        codes[k] = p.wait()
+        log.close()
+    return procs, codes
+
+def merge_results(procs, out_path):
+    """One <testsuites> holding every shard's <testsuite>, tagged with its shard."""
+    merged = ET.Element("testsuites", name="results")
+    missing = []
+    for k, d, _p, _log in procs:
+        path = os.path.join(d, "results.xml")
+        if not os.path.exists(path):
+            missing.append(k)
+            continue
+        for suite in ET.parse(path).getroot().iter("testsuite"):
+            suite.set("name", f"{suite.get('name', 'all')}.shard{k}")
+            suite.insert(0, ET.Element("property", name="shard", value=f"{k}/{len(procs)}"))
+            merged.append(suite)
+    ET.ElementTree(merged).write(out_path, encoding="utf-8", xml_declaration=True)
+    failed = sum(1 for tc in merged.iter("testcase") if tc.find("failure") is not None or tc.find("error") is not None)
+    return failed, missing
+
+def merge_logs(procs, out_path):
+    with open(out_path, "w") as out:
+        for k, d, _p, _log in procs:
+            out.write(f"===== shard {k}/{len(procs)} =====\n")
+            with open(os.path.join(d, "sim.log"), errors="replace") as f:
+                out.write(f.read())
+
+def failing_programs(procs):
+    """(shard, name, seed, index, cycle, message) from every shard's failure log."""
+    out = []
+    for k, d, _p, _log in procs:
+        path = os.path.join(d, "failures.tsv")
+        if not os.path.exists(path):
+            continue
+        with open(path) as f:
+            for line in f:
+                name, seed, index, cycle, msg = line.rstrip("\n").split("\t", 4)
+                out.append((k, name, seed, index, cycle, msg))
+    return out
+
+def replay(module, seed, index, out_dir, extra, window=None, cycle=None):
+    """
+    Re-run one program on the traced build, or only the `window` ("pre:post")
+    around `cycle` on the window build; returns the path of its waveform
+    (None if the simulator wrote none) and whether it failed again.
+    """
+    d = os.path.join(out_dir, f"replay_{index}")
+    env = _run_dir(d, RISCV_FUZZ_INDEX=str(index), RISCV_PREP_WORKERS="0")
+    for stale in glob.glob(os.path.join(d, "window.*")):
+        os.remove(stale)
+    if seed:
+        env["RISCV_FUZZ_SEED"] = seed
+    profile = "traced"
+    if window and cycle not in (None, ""):
+        profile = "window"
+        env.update(RISCV_TRACE_AT=str(cycle), RISCV_TRACE_WINDOW=window)
+    with open(os.path.join(d, "sim.log"), "w") as log:
+        p = _make(["results.xml", f"COCOTB_TEST_MODULES={module}", f"PROFILE={profile}"] + extra, d, env, log)
+        failed = p.wait() != 0 or os.path.exists(os.path.join(d, "failures.tsv"))
+    waves = glob.glob(os.path.join(d, "window.*" if profile == "window" else "dump.*"))
+    if not waves:
+        return None, failed
+    ext = os.path.splitext(waves[0])[1]
+    kept = os.path.join(out_dir, f"replay_{seed or 'default'}_{index}{ext}")
+    shutil.move(waves[0], kept)
+    return kept, failed
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("module", help="cocotb test module, e.g. tests.CPU.random.random_no_mem")
+    ap.add_argument("-j", "--shards", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("-o", "--out", help="output directory (default sharded/<module>)")
+    ap.add_argument("--profile", default="fast", help="Makefile build profile for the campaign")
+    ap.add_argument("--sim-build", help="model directory (default: the profile's SIM_BUILD)")
+    ap.add_argument("--prep-workers", type=int, default=1, help="RISCV_PREP_WORKERS per shard")
+    ap.add_argument("--seed", help="RISCV_FUZZ_SEED for every shard (default: the module's BASE_SEED)")
+    ap.add_argument("--replay", type=int, metavar="INDEX", help="only re-run program INDEX on the traced build")
+    ap.add_argument("--max-replays", type=int, default=3, help="traced re-runs after a campaign (0 = none)")
+    ap.add_argument("--window", metavar="PRE:POST", help="replays trace only these cycles around the failure")
+    ap.add_argument("--at", type=int, metavar="CYCLE", help="failure cycle for --replay --window")
+    ap.add_argument("make_args", nargs="*", help="extra VAR=value arguments for make")
+    args = ap.parse_args(argv)
+
+    out_dir = os.path.abspath(args.out or os.path.join(ROOT, "sharded", args.module))
+    if args.replay is not None:
+        wave, failed = replay(args.module, args.seed, args.replay, out_dir, args.make_args,
+                              args.window, args.at)
+        print(f"replay index={args.replay}: {'FAILED' if failed else 'passed'}, waveform {wave}")
+        return 1 if failed else 0
+
+    sim_build = os.path.abspath(args.sim_build) if args.sim_build else None
+    t0 = time.time()
+    build_model(args.profile, sim_build, args.make_args)
+    t1 = time.time()
+    procs, codes = run_shards(args.module, args.shards, out_dir, args.profile, sim_build,
+                              args.make_args, args.prep_workers, args.seed)
+    t2 = time.time()
+    failed, missing = merge_results(procs, os.path.join(out_dir, "results.xml"))
+    merge_logs(procs, os.path.join(out_dir, "sim.log"))
+
+    print(f"{args.module}: {args.shards} shards, build {t1 - t0:.1f}s, run {t2 - t1:.1f}s -> {out_dir}")
+    failures = failing_programs(procs)
+    for k, name, seed, index, cycle, msg in failures:
+        print(f"FAIL shard {k}: {name} seed={seed} index={index} cycle={cycle}: {msg}")
+    for k, name, seed, index, cycle, msg in failures[:args.max_replays]:
+        if index:
+            wave, _ = replay(args.module, seed or args.seed, int(index), out_dir, args.make_args,
+                             args.window, cycle)
+            print(f"  traced replay of index={index}: {wave or 'no waveform written'}")
+    for k in missing:
+        print(f"ERROR shard {k}: no results.xml (make exited {codes[k]}), see shard_{k}/sim.log")
+    bad = failed or missing or any(codes.values())
+    print("FAILED" if bad else "PASSED")
+    return 1 if bad else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+from cocotb.handle import (HierarchyObject, HierarchyArrayObject, ArrayObject, ValueObjectBase, LogicObject,
+                           IntegerObject, RealObject, StringObject)
+from tests.CPU.memory_view import get_memory_view
+
+# Whole-design checkpoint for tp_lvl: every non-constant signal and unpacked
+# array under the DUT (register file, cache tag/valid/dirty/data arrays,
+# pipeline registers, FSM state...) plus main memory, stored in one .npz.
+# Values wider than 64 bits are split into little-endian uint64 limbs.
+# numpy is only needed here, so it is imported on use.
+
+SKIP_NAMES = {"clk"}   # restoring a clock value would fake an edge
+
+def _skip(h):
+    # sim_* are the testbench request ports (bulk image dump etc.); replaying them re-fires them
+    name = h._name
+    return name in SKIP_NAMES or name.startswith(("__V", "sim_"))
+
+def _leaves(h, path, out, memory):
+    """(path, handle) for every storable object below `h`, depth first."""
+    if isinstance(h, (HierarchyObject, HierarchyArrayObject)):
+        if h is memory:
+            return   # main memory goes through MemoryView.dump()
+        for child in h:
+            if not _skip(child):
+                _leaves(child, f"{path}.{child._name}" if path else child._name, out, memory)
+    elif isinstance(h, ValueObjectBase):
+        if not h.is_const and not isinstance(h, StringObject):
+            out.append((path, h))
+
+_leaf_cache = {}
+
+def _design_leaves(dut):
+    key = dut._path
+    if key not in _leaf_cache:
+        out = []
+        memory = getattr(dut.main_memory, "generate_blocks", None)
+        for child in dut:
+            if not _skip(child):
+                _leaves(child, child._name, out, memory)
+        _leaf_cache[key] = out
+    return _leaf_cache[key]
+
+def _read(h):
+    """Python value(s) of a leaf: int, float, or a list for unpacked arrays."""
+    if isinstance(h, ArrayObject):
+        return [_read(h[i]) for i in h.range]
+    if isinstance(h, RealObject):
+        return float(h.value)
+    if isinstance(h, LogicObject):
+        return int(h.value)
+    v = h.value
+    return v.to_unsigned() if hasattr(v, "to_unsigned") else int(v)
+
+def _write(h, value):
+    if isinstance(h, ArrayObject):
+        for i, v in zip(h.range, value):
+            _write(h[i], v)
+    elif isinstance(h, IntegerObject) and value >= 1 << 31:
+        h.value = value - (1 << 32)   # stored as unsigned limbs
+    else:
+        h.value = value
+
+def _flatten(value):
+    if isinstance(value, list):
+        return [x for v in value for x in _flatten(v)]
+    return [value]
+
+def _encode(value):
+    import numpy as np
+    flat = _flatten(value)
+    if flat and isinstance(flat[0], float):
+        return np.array(flat, dtype=np.float64)
+    flat = [v & 0xFFFFFFFF if v < 0 else v for v in flat]   # negative ints only come from 32-bit int signals
+    limbs = max(1, (max(flat, default=0).bit_length() + 63) // 64)
+    arr = np.array([[(v >> (64 * k)) & 0xFFFFFFFFFFFFFFFF for k in range(limbs)] for v in flat],
+                   dtype=np.uint64)
+    return arr.reshape(-1) if limbs == 1 else arr
+
+def _decode(arr):
+    if arr.dtype.kind == "f":
+        return [float(v) for v in arr]
+    if arr.ndim == 1:
+        return [int(v) for v in arr]
+    return [sum(int(limb) << (64 * k) for k, limb in enumerate(row)) for row in arr]
+
+def _unflatten(h, flat, pos=0):
+    """Rebuild the nested list shape of array handle `h` from a flat value list."""
+    if isinstance(h, ArrayObject):
+        out = []
+        for i in h.range:
+            v, pos = _unflatten(h[i], flat, pos)
+            out.append(v)
+        return out, pos
+    return flat[pos], pos + 1
+
+async def capture_state(dut) -> dict:
+    """name -> numpy array for every leaf, plus "__main_memory__" as uint8."""
+    import numpy as np
+    state = {path: _encode(_read(h)) for path, h in _design_leaves(dut)}
+    state["__main_memory__"] = np.frombuffer(await get_memory_view(dut).dump(), dtype=np.uint8)
+    return state
+
+async def save_snapshot(dut, path):
+    """Write the current design state to `path` (.npz, compressed)."""
+    import numpy as np
+    np.savez_compressed(path, **await capture_state(dut))
+
+async def restore_snapshot(dut, path):
+    """
+    Put the DUT back into a state saved by save_snapshot(). Stop the clock
+    first; combinational signals are simply recomputed on the next
+    evaluation. Leaves missing from the file are reported, not guessed.
+    """
+    import numpy as np
+    with np.load(path) as snap:
+        missing = []
+        for name, h in _design_leaves(dut):
+            if name not in snap.files:
+                missing.append(name)
+                continue
+            flat = _decode(snap[name])
+            value = _unflatten(h, flat)[0] if isinstance(h, ArrayObject) else flat[0]
+            _write(h, value)
+        image = snap["__main_memory__"].tobytes()
+    mv = get_memory_view(dut)
+    mv.load_image(image, clear_mem=True)
+    await mv.settle()
+    if missing:
+        dut._log.warning(f"Snapshot {path} has no value for {len(missing)} signals, e.g. {missing[:5]}")
+    return missing
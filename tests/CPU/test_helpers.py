@@ -1,88 +1,124 @@
 import cocotb
 from cocotb.clock import Clock, Timer
-from cocotb.triggers import RisingEdge, ReadOnly, ReadWrite, First
+from cocotb.triggers import RisingEdge, ReadOnly, ReadWrite, First, ClockCycles
+from cocotb.utils import get_sim_time
 import sys, os
+import contextlib
+import logging
 sys.path.append(os.path.dirname(__file__))
 from tests.CPU.riscv_tests_gen import *
-
-async def resetAndPrepare(dut):
-    clock =Clock(dut.clk, 1, unit="ns")
-    cocotb.start_soon(clock.start())
-    dut.reset_pin.value = 1
-    # Hold reset for 5 clock cycles
-    for _ in range(5):
-        await RisingEdge(dut.clk)
-    dut.reset_pin.value = 0
-    clock.stop()
-    # Wait a cycle for reset to de-assert
-    #await RisingEdge(dut.clk)
-    await ReadWrite()
-    
-
+from tests.CPU.riscv_asm import render
+from tests.CPU.riscv_disasm import Listing, disassemble_word
+from tests.CPU.elf_utils import ElfFile
+from tests.CPU.memory_view import MemoryView, get_memory_view, get_cache_overlay
+from tests.CPU.snapshot import save_snapshot, restore_snapshot, capture_state
+from tests.CPU.lockstep import LockstepChecker, LOCKSTEP_ENABLED
+from tests.CPU import trace_window
+
+# ---------- harness clock ----------
+CYCLE_BUDGET_BASE = 1000      # reset, pipeline fill, first cache misses
+CYCLE_BUDGET_PER_INST = 32    # generous: a load/store miss with a dirty eviction is ~2 line transfers
+
+def cycleBudget(n_insts):
+    """max_cycles for a program of `n_insts` instructions."""
+    return CYCLE_BUDGET_BASE + CYCLE_BUDGET_PER_INST * n_insts
+
+class Harness:
+    """
+    One free-running clock for a whole test. Programs run back to back
+    under it: hold_reset() keeps the CPU in reset while memory is loaded,
+    run_until_complete() releases it and waits for program_complete.
+    With RISCV_TRACE_AT=<cycle> on a PROFILE=window model, each program's
+    run also captures the RISCV_TRACE_WINDOW ("pre:post") cycles around it.
+    """
+    def __init__(self, dut, period_ns=1, reset_cycles=5):
+        self.dut = dut
+        self.period_ns = period_ns
+        self.reset_cycles = reset_cycles
+        self.cycles = 0   # of the last run, up to where it stopped
+        self.clock = Clock(dut.clk, period_ns, unit="ns")
+        cocotb.start_soon(self.clock.start())
+        self.trace = None
+        if trace_window.TRACE_AT is not None:
+            if trace_window.available():
+                pre, post = trace_window.parse_window(trace_window.TRACE_WINDOW)
+                self.trace = trace_window.TraceWindow(dut, pre=pre, post=post)
+            else:
+                dut._log.warning("RISCV_TRACE_AT ignored: model not built with PROFILE=window")
+
+    async def hold_reset(self):
+        """Assert reset for reset_cycles edges and leave it asserted."""
+        self.dut.reset_pin.value = 1
+        await ClockCycles(self.dut.clk, self.reset_cycles)
+
+    def fetch_pc(self) -> int:
+        return int(self.dut.register_table.pc_storage.value)
+
+    def _where(self):
+        pc = self.fetch_pc()
+        try:
+            word = int.from_bytes(get_memory_view(self.dut).read(pc, 4), "little")
+        except ValueError:
+            return f"pc 0x{pc:x}"
+        return f"pc 0x{pc:x}: {disassemble_word(word, pc)}"
+
+    async def _release(self, registers=None):
+        await RisingEdge(self.dut.clk)
+        self.dut.reset_pin.value = 0
+        if registers is not None:
+            # the register file clears on every edge under reset, so poke
+            # it only once the releasing edge has settled
+            await ReadWrite()
+            loadRegisters(registers, self.dut)
+
+    async def run_cycles(self, cycles):
+        """Release reset and run `cycles` edges whether or not the program completes."""
+        await self._release()
+        await ClockCycles(self.dut.clk, cycles)
+
+    async def run_until_complete(self, max_cycles, lockstep=None, registers=None) -> int:
+        """
+        Release reset (then load `registers` as loadRegisters would) and
+        return the cycles until program_complete. Raises AssertionError
+        with the fetch PC after max_cycles, or with the lockstep report if
+        the checker flags a divergence first.
+        """
+        dut = self.dut
+        await self._release(registers)
+        start = get_sim_time(unit="ns")
+        window = self.trace.arm(int(trace_window.TRACE_AT, 0)) if self.trace else None
+        triggers = [RisingEdge(dut.program_complete), ClockCycles(dut.clk, max_cycles)]
+        if lockstep is not None:
+            triggers.append(lockstep.diverged.wait())
+        await First(*triggers)
+        cycles = self.cycles = round((get_sim_time(unit="ns") - start) / self.period_ns)
+        if window is not None:
+            await window   # let the file close before a failing check ends the test
+        if lockstep is not None:
+            lockstep.check()
+        if not int(dut.program_complete.value):
+            raise AssertionError(f"Program did not complete within {max_cycles} cycles ({self._where()})")
+        return cycles
 
 def _mem_params(dut):
-    NUMBER_OF_BLOCKS    = dut.main_memory.NUMBER_OF_BLOCKS.value.to_unsigned()
-    ENTRIES_PER_BLOCK   = dut.main_memory.ENTRIES_PER_BLOCK.value.to_unsigned()
-    BLOCK_SIZE_BITS     = dut.main_memory.BLOCK_SIZE.value.to_unsigned()           # width of one mem word
-    WORD_BYTES          = BLOCK_SIZE_BITS // 8
-    assert BLOCK_SIZE_BITS % 8 == 0, "BLOCK_SIZE must be byte-aligned"
-    WORD_BYTES = BLOCK_SIZE_BITS // 8
-    return NUMBER_OF_BLOCKS, ENTRIES_PER_BLOCK, WORD_BYTES
+    mv = get_memory_view(dut)
+    return mv.NUMBER_OF_BLOCKS, mv.ENTRIES_PER_BLOCK, mv.WORD_BYTES
 
 def _get_word_handle(dut, word_index):
-    """
-    Map linear word index -> (block, entry):
-      block = w % NUMBER_OF_BLOCKS
-      entry = w // NUMBER_OF_BLOCKS
-    Adjust the path if your hierarchy differs.
-    """
-    NUMBER_OF_BLOCKS, _, _ = _mem_params(dut)
-    block = word_index % NUMBER_OF_BLOCKS
-    entry = word_index // NUMBER_OF_BLOCKS
-    return dut.main_memory.generate_blocks[block].mem_blk[entry]
+    """Handle of linear word `word_index` (block = w % N, entry = w // N), cached."""
+    return get_memory_view(dut).handle(word_index)
 
 async def awrite_bytes_to_mem(dut, base_addr: int, data: bytes):
     """
-    Async byte-accurate write:
-    - Batches updates per *word* (fast).
-    - After each word assignment, awaits one delta (ReadWrite) so
-      downstream reads in the same timestep see the new value.
+    Async byte-accurate write: whole words are stored directly, partial
+    ones read-modify-written, then a single delta (ReadWrite) lets the
+    whole update settle so downstream reads in the same timestep see it.
     """
     if not data:
         return
-
-    NUMBER_OF_BLOCKS, ENTRIES_PER_BLOCK, WORD_BYTES = _mem_params(dut)
-    max_words = ENTRIES_PER_BLOCK * NUMBER_OF_BLOCKS
-
-    last_byte = base_addr + len(data) - 1
-    last_word = last_byte // WORD_BYTES
-    if last_word >= max_words:
-        raise ValueError(f"Write past memory end (last_word={last_word}, max_words={max_words})")
-
-    first_word = base_addr // WORD_BYTES
-    # Iterate word-by-word over the touched range
-    for w in range(first_word, last_word + 1):
-        # Compute slice of `data` landing in this word
-        word_base_addr = w * WORD_BYTES
-        # data indices overlapping this word:
-        lo = max(0, word_base_addr - base_addr)
-        hi = min(len(data), (word_base_addr + WORD_BYTES) - base_addr)
-        if lo >= hi:
-            continue
-
-        boff = (base_addr + lo) - word_base_addr  # byte offset in word
-        chunk = hi - lo
-
-        h = _get_word_handle(dut, w)
-
-        # Read current word, patch bytes (LE), write back
-        cur = int(h.value)
-        word_bytes = bytearray(cur.to_bytes(WORD_BYTES, "little"))
-        word_bytes[boff:boff+chunk] = data[lo:hi]
-        h.value = int.from_bytes(word_bytes, "little")
-
-        # Let the assignment settle this delta
-        await ReadWrite()
+    mv = get_memory_view(dut)
+    mv.write(base_addr, data)
+    await mv.settle()
 
 async def awrite_u64(dut, addr: int, value: int):
     await awrite_bytes_to_mem(dut, addr, value.to_bytes(8, "little"))
@@ -94,7 +130,6 @@ async def awrite_u16(dut, addr: int, value: int):
     await awrite_bytes_to_mem(dut, addr, value.to_bytes(2, "little"))
 
 async def awrite_u8(dut, addr: int, value: int):
-    # Per-byte path still batches per word and awaits once
     await awrite_bytes_to_mem(dut, addr, bytes([value & 0xFF]))
 
 async def awrite_pattern(dut, base_addr: int, byte_list):
@@ -107,62 +142,215 @@ async def aread_word_le(dut, addr_aligned: int):
     Read a full word at an aligned address (LE), after a ReadOnly to
     sample a stable value in the current timestep.
     """
-    _, _, WORD_BYTES = _mem_params(dut)
-    assert addr_aligned % WORD_BYTES == 0, "Unaligned word read"
-    widx = addr_aligned // WORD_BYTES
-    h = _get_word_handle(dut, widx)
+    mv = get_memory_view(dut)
+    assert addr_aligned % mv.WORD_BYTES == 0, "Unaligned word read"
+    h = mv.handle(addr_aligned // mv.WORD_BYTES)
     await ReadOnly()
     return int(h.value)
 
+def readMemoryBytes(dut, base_addr: int, length: int) -> bytes:
+    """Current contents of DUT main memory [base_addr, base_addr+length)."""
+    return get_memory_view(dut).read(base_addr, length)
 
-def loadAsmToMemory(asm_string, dut, *, clear_mem=True):
-    compiled = assemble_rv32i_bytes(asm_string)  # list/bytes of assembled code
-    mnemonics = disassemble_rv32i(asm_string)
-    log_bit_grid(dut, compiled, mnemonics)
-    return loadCompiledToMemory(compiled, dut, clear_mem=clear_mem)
-
-
+def logMemoryDisassembly(dut, base_addr: int, length: int, symbols=None):
+    """
+    Bit grid + disassembly of what is *in DUT memory* right now (e.g. after
+    self-modifying code ran), decoded in-process.
+    """
+    raw = readMemoryBytes(dut, base_addr, length)
+    log_bit_grid(dut, raw, Listing(raw, base_addr, symbols), base=base_addr, level=logging.INFO)
+    return raw
 
-def loadCompiledToMemory(compiled, dut, *, clear_mem=True):
 
-    # Read SV params from the DUT
-    NUMBER_OF_BLOCKS    = dut.main_memory.NUMBER_OF_BLOCKS.value.to_unsigned()
-    ENTRIES_PER_BLOCK   = dut.main_memory.ENTRIES_PER_BLOCK.value.to_unsigned()
-    BLOCK_SIZE_BITS     = dut.main_memory.BLOCK_SIZE.value.to_unsigned()           # width of one mem word
-    WORD_BYTES          = BLOCK_SIZE_BITS // 8
+# ---------- failure-only diagnostics ----------
+class ProgramDiagnostics:
+    """
+    What is needed to explain a loaded program later: its bytes, source and
+    seed. Listing, disassembly and bit grid are only formatted by report(),
+    i.e. when a check fails or the logger is enabled for that level.
+    `source` is asm text or a list of riscv_asm.Inst (rendered on demand).
+    """
+    __slots__ = ("name", "raw", "source", "seed", "index", "symbols", "cycle")
+
+    def __init__(self, name, raw, source=None, *, seed=None, index=None, symbols=None):
+        self.name = name
+        self.raw = raw
+        self.source = source
+        self.seed = seed
+        self.index = index
+        self.symbols = symbols
+        self.cycle = None
+
+    @classmethod
+    def from_program(cls, name, prog, source=None, **kw):
+        return cls(name, prog.raw, source, symbols=prog.symbols, **kw)
+
+    def header(self):
+        where = []
+        if self.seed is not None:
+            where.append(f"seed=0x{self.seed:x}")
+        if self.index is not None:
+            where.append(f"index={self.index}")
+        return f"# --- {self.name} {' '.join(where)} ({len(self.raw) // 4} insts) ---"
+
+    def listing(self):
+        if self.source is None:
+            return ""
+        if isinstance(self.source, str):
+            return self.source
+        return render(self.source)
+
+    def report(self, dut, level=logging.ERROR):
+        """Header, source listing and bit grid at `level` (no-op if that level is off)."""
+        if not dut._log.isEnabledFor(level):
+            return
+        dut._log.log(level, f"{self.header()}\n{self.listing()}")
+        log_bit_grid(dut, self.raw, Listing(self.raw, 0, self.symbols), level=level)
+
+    def log_if_enabled(self, dut, level=logging.DEBUG):
+        self.report(dut, level)
+
+    @contextlib.contextmanager
+    def on_failure(self, dut, level=logging.ERROR, harness=None):
+        """
+        Wrap the result checks: any exception reports the program, then
+        propagates. With `harness`, the cycle its run stopped at is recorded.
+        """
+        try:
+            yield self
+        except Exception as e:
+            if harness is not None:
+                self.cycle = harness.cycles
+            self.report(dut, level)
+            self.record_failure(e)
+            raise
+
+    def record_failure(self, exc):
+        """Append (name, seed, index, cycle, message) to $RISCV_FAILURE_LOG, if set (see run_sharded)."""
+        path = os.environ.get("RISCV_FAILURE_LOG")
+        if not path:
+            return
+        seed = "" if self.seed is None else f"0x{self.seed:x}"
+        index = "" if self.index is None else str(self.index)
+        cycle = "" if self.cycle is None else str(self.cycle)
+        msg = (str(exc).splitlines() or [type(exc).__name__])[0]
+        with open(path, "a") as f:
+            f.write(f"{self.name}\t{seed}\t{index}\t{cycle}\t{msg}\n")
+
+def shardRange(num_programs):
+    """
+    Program indices this process runs: all of them, or contiguous slice k of
+    N when RISCV_SHARD=k/N (or plusarg +shard=k/N) is set, as run_sharded does.
+    RISCV_FUZZ_INDEX=i (+fuzz_index=i) runs program i alone, for replays.
+    """
+    index = cocotb.plusargs.get("fuzz_index") or os.environ.get("RISCV_FUZZ_INDEX")
+    if index:
+        i = int(index, 0)
+        if not 0 <= i < num_programs:
+            raise ValueError(f"fuzz index {i} outside 0..{num_programs - 1}")
+        return range(i, i + 1)
+    spec = cocotb.plusargs.get("shard") or os.environ.get("RISCV_SHARD")
+    if not spec:
+        return range(num_programs)
+    k, n = (int(v) for v in spec.split("/"))
+    if not 0 <= k < n:
+        raise ValueError(f"bad shard {spec!r}")
+    return range(k * num_programs // n, (k + 1) * num_programs // n)
+
+def fuzzSeed(default):
+    """Campaign base seed: RISCV_FUZZ_SEED (+fuzz_seed=), decimal or 0x-hex, else `default`."""
+    spec = cocotb.plusargs.get("fuzz_seed") or os.environ.get("RISCV_FUZZ_SEED")
+    return int(spec, 0) if spec else default
+
+
+def startLockstep(dut, prog, *, force=False):
+    """
+    LockstepChecker for `prog` (AssembledProgram) started on the running
+    clock, or None unless RISCV_LOCKSTEP=1 (or force): it costs a few signal
+    reads per simulated cycle.
+    """
+    if not (LOCKSTEP_ENABLED or force):
+        return None
+    return LockstepChecker(dut, prog.raw, get_memory_view(dut).size, prog.symbols).start()
 
-    if BLOCK_SIZE_BITS % 8 != 0:
-        raise ValueError(f"BLOCK_SIZE ({BLOCK_SIZE_BITS}) must be byte-aligned")
+def loadAsmToMemory(asm_string, dut, *, clear_mem=True):
+    prog = assemble_rv32i(asm_string)  # one as/ld pass -> bytes + mnemonics + labels
+    log_bit_grid(dut, prog.raw, prog.mnemonics)
+    loadCompiledToMemory(prog.raw, dut, clear_mem=clear_mem)
+    return prog
 
-    # How many words do we need to hold the compiled bytes?
-    total_words = (len(compiled) + WORD_BYTES - 1) // WORD_BYTES
-    needed_entries = (total_words + NUMBER_OF_BLOCKS - 1) // NUMBER_OF_BLOCKS
-    if needed_entries > ENTRIES_PER_BLOCK:
-        raise ValueError(
-            f"Program needs {needed_entries} entries per block, "
-            f"but ENTRIES_PER_BLOCK={ENTRIES_PER_BLOCK}"
-        )
 
-    # Optional: clear memory
-    if clear_mem:
-        for bi in range(NUMBER_OF_BLOCKS):
-            for ei in range(ENTRIES_PER_BLOCK):
-                dut.main_memory.generate_blocks[bi].mem_blk[ei].value = 0
 
-    # Pack bytes -> words (little-endian within each word) and store
-    for w in range(total_words):
-        start = w * WORD_BYTES
-        end   = min(start + WORD_BYTES, len(compiled))
-        word_val = 0
-        for b, byte in enumerate(compiled[start:end]):
-            word_val |= int(byte) << (8 * b)  # little-endian byte order
+# ---------- shadow image / bulk port ----------
+def markMemoryDirty(dut, base_addr=0, length=None):
+    """RTL may have written [base_addr, base_addr+length) (default: everything); reload it next time."""
+    get_memory_view(dut).mark_dirty(base_addr, length)
 
-        block_idx = w % NUMBER_OF_BLOCKS
-        entry_idx = w // NUMBER_OF_BLOCKS
+def resyncMemoryShadow(dut, base_addr=0, length=None):
+    """Read back only the unknown (dirty) words of the range so the shadow matches the DUT again."""
+    get_memory_view(dut).resync(base_addr, length)
 
-        # Path: generate_blocks[block].mem_blk[entry]
-        dut.main_memory.generate_blocks[block_idx].mem_blk[entry_idx].value = word_val
+async def adumpMemory(dut) -> bytes:
+    """Whole main memory as bytes (bulk $writememh when the build has the port)."""
+    return await get_memory_view(dut).dump()
 
+def readThroughDataCache(dut, base_addr: int, length: int) -> bytes:
+    """
+    What a load would see: main memory with lines valid in dut.data_cache
+    patched in. Memory comes from the shadow; mark the range dirty first if
+    the program may have stored to it.
+    """
+    backing = get_memory_view(dut).read_shadowed(base_addr, length)
+    return get_cache_overlay(dut.data_cache).apply(base_addr, backing)
+
+def firstMismatch(got: bytes, expected: bytes):
+    """Offset of the first differing byte, or None; equal buffers cost one memcmp."""
+    if got == expected:
+        return None
+    try:
+        import numpy as np
+    except ImportError:
+        return next((i for i, (a, b) in enumerate(zip(got, expected)) if a != b), min(len(got), len(expected)))
+    n = min(len(got), len(expected))
+    diff = np.flatnonzero(np.frombuffer(got, np.uint8, n) != np.frombuffer(expected, np.uint8, n))
+    return int(diff[0]) if diff.size else n
+
+def loadCompiledToMemory(compiled, dut, *, clear_mem=True, diff=False):
+    """See MemoryView.load_image; returns the number of words written."""
+    return get_memory_view(dut).load_image(compiled, clear_mem=clear_mem, diff=diff)
+
+
+def readRegisters(dut):
+    """x0..x31 as unsigned ints; one VPI read via the RTL's packed mirror when it exists."""
+    try:
+        packed = dut.register_table.sim_x_regs_packed.value.to_unsigned()
+    except AttributeError:
+        return [dut.register_table.register_storage[i].value.to_unsigned() for i in range(32)]
+    return [(packed >> (64 * i)) & 0xFFFFFFFFFFFFFFFF for i in range(32)]
+
+def checkRegisters(expected, dut, signed=False):
+    """Check {reg: value} against one bulk read of the register file."""
+    regs = readRegisters(dut)
+    for number, ref in expected.items():
+        val = regs[number]
+        if signed and val >> 63:
+            val -= 1 << 64
+        assert val == ref, f"Expected {ref:d} for register {number:d}, got {val:d}"
+
+def loadElfToMemory(dut, path, *, clear_mem=True, diff=False):
+    """
+    Load a linked ELF (e.g. firmware/build/app.elf) straight into main
+    memory: PT_LOAD segments at their physical addresses with .bss zeroed,
+    no objcopy/bin_separator step. The returned program's `symbols` maps
+    every named symbol (entry point, result buffers, tohost-style markers,
+    MMIO PROVIDEs) to its address.
+    """
+    with open(path, "rb") as f:
+        elf = ElfFile(f.read())
+    raw = elf.load_image()
+    symbols = elf.symbol_table()
+    loadCompiledToMemory(raw, dut, clear_mem=clear_mem, diff=diff)
+    return AssembledProgram(raw, Listing(raw, 0, symbols), symbols)
 
 def loadRegisters(register_list, dut):
     for i in range(len(register_list)):
@@ -0,0 +1,42 @@
+// Windowed FST capture for the PROFILE=window build (see trace_window.py).
+//
+// cocotb's Verilator main only opens its own dump when run with --trace, so a
+// model built with --trace but run without it traces nothing until Python
+// calls trace_window_open(). From then on Python calls trace_window_dump() on
+// every clock edge until trace_window_close(). The model is linked -rdynamic,
+// so these symbols resolve through ctypes.CDLL(None).
+#include <cstdint>
+#include "verilated.h"
+#include "verilated_fst_c.h"
+
+static VerilatedFstC* window_tfp = nullptr;
+
+extern "C" {
+
+// 1 if `path` is open (or already was), 0 on failure.
+int trace_window_open(const char* path) {
+    if (window_tfp) return 1;
+    window_tfp = new VerilatedFstC;
+    Verilated::defaultContextp()->trace(window_tfp, 99);
+    window_tfp->open(path);
+    if (!window_tfp->isOpen()) {
+        delete window_tfp;
+        window_tfp = nullptr;
+        return 0;
+    }
+    return 1;
+}
+
+// `time` in simulator precision steps, non-decreasing
+void trace_window_dump(uint64_t time) {
+    if (window_tfp) window_tfp->dump(time);
+}
+
+void trace_window_close(void) {
+    if (!window_tfp) return;
+    window_tfp->close();
+    delete window_tfp;
+    window_tfp = nullptr;
+}
+
+}
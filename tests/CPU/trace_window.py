@@ -0,0 +1,126 @@
+import ctypes
+import os
+import cocotb
+from cocotb.triggers import RisingEdge, FallingEdge, ReadOnly, ClockCycles
+from cocotb.utils import get_sim_time
+
+# Windowed waveform capture: the PROFILE=window model is built with --trace
+# and trace_window.cpp but writes nothing by itself. A TraceWindow opens an
+# FST, dumps on both clock edges while it is open and closes it, so file size
+# and tracing cost follow the window, not the run.
+#
+# Cycles before a trigger cannot be recovered once they have run untraced.
+# A window that starts N cycles early is therefore armed at a known cycle,
+# normally one recorded by a previous run of the same program
+# (RISCV_TRACE_AT, see Harness and run_sharded --window).
+
+TRACE_AT = os.environ.get("RISCV_TRACE_AT")              # program cycle of the trigger
+TRACE_WINDOW = os.environ.get("RISCV_TRACE_WINDOW", "")  # "pre:post" cycles around it
+TRACE_FILE = os.environ.get("RISCV_TRACE_FILE", "window.fst")
+
+_lib = None
+
+def _load():
+    global _lib
+    if _lib is None:
+        exe = ctypes.CDLL(None)
+        try:
+            fns = (exe.trace_window_open, exe.trace_window_dump, exe.trace_window_close)
+        except AttributeError:
+            fns = ()
+        if fns:
+            fns[0].argtypes, fns[0].restype = [ctypes.c_char_p], ctypes.c_int
+            fns[1].argtypes, fns[1].restype = [ctypes.c_uint64], None
+            fns[2].argtypes, fns[2].restype = [], None
+        _lib = fns
+    return _lib
+
+def available():
+    """True if the running model was built with PROFILE=window."""
+    return bool(_load())
+
+def parse_window(spec, default=(200, 50)):
+    """'pre:post' -> (pre, post) cycles."""
+    if not spec:
+        return default
+    pre, post = (int(v, 0) for v in spec.split(":"))
+    return pre, post
+
+class TraceWindow:
+    """
+    tw = TraceWindow(dut, "fail.fst", pre=200, post=50)
+    tw.arm(1234)                  # cycle 1234 from now, with 200 before and 50 after
+    tw.capture_on(trigger)        # live trigger: the `post` cycles after it fire
+    tw.start() ... tw.stop()      # manual
+    A window is captured once; later arm/start calls are ignored.
+    """
+    def __init__(self, dut, path=TRACE_FILE, pre=200, post=50):
+        if not available():
+            raise RuntimeError("model has no trace window hooks (build with PROFILE=window)")
+        self.dut = dut
+        self.path = path
+        self.pre = pre
+        self.post = post
+        self.opened = False
+        self.done = False
+        self._dumper = None
+
+    @property
+    def is_open(self):
+        return self.opened and not self.done
+
+    def start(self):
+        if self.opened:
+            return
+        if not _load()[0](os.fsencode(self.path)):
+            raise RuntimeError(f"cannot open trace file {self.path}")
+        self.opened = True
+        _load()[1](get_sim_time(unit="step"))
+        self._dumper = cocotb.start_soon(self._dump_edges())
+        self.dut._log.info(f"trace window open: {self.path}")
+
+    def stop(self):
+        if not self.is_open:
+            return
+        self.done = True
+        if self._dumper is not None and not self._dumper.done():
+            self._dumper.cancel()
+        _load()[2]()
+        self.dut._log.info(f"trace window closed: {self.path}")
+
+    async def _dump_edges(self):
+        clk, dump = self.dut.clk, _load()[1]
+        while True:
+            await RisingEdge(clk)
+            await ReadOnly()
+            dump(get_sim_time(unit="step"))
+            await FallingEdge(clk)
+            await ReadOnly()
+            dump(get_sim_time(unit="step"))
+
+    async def _window(self, at):
+        clk = self.dut.clk
+        first = max(at - self.pre, 0)
+        if first:
+            await ClockCycles(clk, first)
+        self.start()
+        await ClockCycles(clk, at - first + self.post)
+        self.stop()
+
+    async def _after(self, trigger):
+        await trigger
+        self.start()
+        await ClockCycles(self.dut.clk, self.post)
+        self.stop()
+
+    def arm(self, at):
+        """Capture cycles [at - pre, at + post], counted from the next clock edge."""
+        if self.opened:
+            return None
+        return cocotb.start_soon(self._window(at))
+
+    def capture_on(self, trigger):
+        """Open when `trigger` (e.g. lockstep.diverged.wait()) fires, close `post` cycles later."""
+        if self.opened:
+            return None
+        return cocotb.start_soon(self._after(trigger))
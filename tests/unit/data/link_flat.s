@@ -0,0 +1,24 @@
+# Source of link_flat.o (assembled with -march=rv64i -mno-relax); see test_elf_utils.py
+.text
+start:
+    addi x1, x0, 5
+back:
+    beq  x1, x0, far
+    jal  x0, far
+here:
+    auipc x5, %pcrel_hi(data)
+    addi  x5, x5, %pcrel_lo(here)
+st:
+    auipc x6, %pcrel_hi(data)
+    sd    x1, %pcrel_lo(st)(x6)
+    lui   x7, %hi(data)
+    addi  x7, x7, %lo(data)
+    sw    x1, %lo(data)(x7)
+    bne   x1, x0, back
+.section .text.b,"ax",@progbits
+.balign 8
+far:
+    jal x0, start
+data:
+    .word back
+    .dword here
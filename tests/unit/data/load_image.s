@@ -0,0 +1,22 @@
+# Source of load_image.elf: two PT_LOAD segments (.text; .data + .bss) with a gap.
+# as -march=rv64i, then ld -T load_image.ld -z max-page-size=16 (script below); see test_elf_utils.py
+.text
+_start:
+    addi x1, x0, 1
+    ecall
+.data
+value:
+    .dword 0x1122334455667788
+.bss
+buf:
+    .zero 24
+
+# load_image.ld
+# PHDRS { text PT_LOAD; data PT_LOAD; }
+# SECTIONS {
+#     . = 0x1000;
+#     .text : { *(.text) } :text
+#     . = 0x1100;
+#     .data : { *(.data) } :data
+#     .bss : { *(.bss) } :data
+# }
@@ -0,0 +1,22 @@
+from tests.CPU import riscv_asm
+from tests.CPU import riscv_tests_gen as gen
+from tests.CPU.riscv_disasm import Listing
+
+SRC = "loop:\naddi x1, x1, -1\nbne x1, x0, loop\necall\n"
+
+def _gnu_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(gen, "toolchain_version", lambda: "test")
+    monkeypatch.setattr(gen, "ASM_BACKEND", "gnu")
+    monkeypatch.setattr(gen, "ASM_CACHE_ENABLED", True)
+    cache = gen.AsmCache(str(tmp_path))
+    monkeypatch.setattr(gen, "_asm_cache", cache)
+    return cache
+
+def test_hit_keeps_listing_undecoded(tmp_path, monkeypatch):
+    cache = _gnu_cache(tmp_path, monkeypatch)
+    raw, mnemonics, symbols = riscv_asm.assemble(SRC)
+    cache.put(cache.key(SRC), raw=raw, mnemonics=Listing(raw, 0, symbols), symbols=symbols)
+    for prog in (gen.assemble_rv32i(SRC), gen.assemble_rv32i_batch([SRC])[0]):
+        assert isinstance(prog.mnemonics, Listing) and "pending" in repr(prog.mnemonics)
+        assert (prog.raw, prog.symbols) == (raw, symbols)
+        assert list(prog.mnemonics) == list(mnemonics)
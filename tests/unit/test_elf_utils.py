@@ -0,0 +1,47 @@
+import os
+import pytest
+from tests.CPU.elf_utils import PT_LOAD, ElfFile, link_flat
+
+# link_flat.o is link_flat.s assembled once with binutils; the expected images
+# are what `ld -Ttext=<base> --no-relax` + `objcopy -O binary` made of it.
+DATA = os.path.join(os.path.dirname(__file__), "data")
+
+LD_IMAGE = {
+    0x000: "93005000638600026f00800297020000938282021703000023301302b70300009383430323aa1302"
+           "e39e00fc000000006ff01ffd040000000c00000000000000",
+    0x100: "93005000638600026f00800297020000938282021703000023301302b70300009383431323aa1312"
+           "e39e00fc000000006ff01ffd040100000c01000000000000",
+}
+SYMBOLS = {"start": 0, "back": 4, "here": 12, "st": 20, "far": 48, "data": 52}
+
+def _object():
+    with open(os.path.join(DATA, "link_flat.o"), "rb") as f:
+        return ElfFile(f.read())
+
+@pytest.mark.parametrize("base", sorted(LD_IMAGE))
+def test_link_flat_matches_ld(base):
+    image, symbols = link_flat(_object(), base)
+    assert image.hex() == LD_IMAGE[base]
+    assert symbols == {name: base + addr for name, addr in SYMBOLS.items()}
+
+# ---------- linked executables ----------
+# load_image.elf: .text (8 bytes) at 0x1000, then .data (8 bytes) + .bss (24 bytes) at 0x1100
+TEXT = bytes.fromhex("9300100073000000")
+DATA_WORD = (0x1122334455667788).to_bytes(8, "little")
+
+def _executable():
+    with open(os.path.join(DATA, "load_image.elf"), "rb") as f:
+        return ElfFile(f.read())
+
+def test_load_image_fills_gaps_and_bss():
+    elf = _executable()
+    assert [(s.paddr, s.filesz, s.memsz) for s in elf.segments() if s.type == PT_LOAD] == \
+        [(0x1000, 8, 8), (0x1100, 8, 0x20)]
+    image = elf.load_image(0x1000)
+    assert image == TEXT + bytes(0x100 - 8) + DATA_WORD + bytes(24)
+    assert elf.load_image(0) == bytes(0x1000) + image
+    assert elf.symbol_table() == {"_start": 0x1000, "value": 0x1100, "buf": 0x1108}
+
+def test_load_image_below_base():
+    with pytest.raises(ValueError, match="below load base"):
+        _executable().load_image(0x1004)
@@ -0,0 +1,40 @@
+import os
+import shutil
+import subprocess
+import pytest
+from tests.CPU import model_cache
+
+needs_make = pytest.mark.skipif(
+    not (shutil.which("make") and shutil.which("cocotb-config") and shutil.which("verilator")),
+    reason="needs make, cocotb and verilator on PATH")
+
+def _resolved(target, *args):
+    out = subprocess.run(["make", "-s", "-C", model_cache.ROOT, target, "SUITE_GOAL=print_sim_build", *args],
+                         capture_output=True, text=True, check=True).stdout
+    return out.strip().splitlines()[-1]
+
+def test_key_tracks_toplevel_and_args():
+    base = model_cache.model_key("tp_lvl", ["--trace"])
+    assert base == model_cache.model_key("tp_lvl", ["--trace"])
+    assert base != model_cache.model_key("uart_tb", ["--trace"])
+    assert base != model_cache.model_key("tp_lvl", [])
+    assert base != model_cache.model_key("tp_lvl", ["--trace", "-GX=1"])
+
+def test_key_tracks_rtl_contents(tmp_path):
+    (tmp_path / "a.sv").write_text("module a; endmodule\n")
+    k1 = model_cache.model_key("a", rtl_dir=str(tmp_path))
+    os.utime(tmp_path / "a.sv", (0, 0))
+    assert model_cache.model_key("a", rtl_dir=str(tmp_path)) == k1   # mtime alone is not a change
+    (tmp_path / "a.sv").write_text("module a; logic x; endmodule\n")
+    assert model_cache.model_key("a", rtl_dir=str(tmp_path)) != k1
+
+@needs_make
+def test_suites_resolve_their_own_model_through_make():
+    # the recursive suite targets must not inherit the parent's (tp_lvl, traced) SIM_BUILD
+    tp_lvl = _resolved("tp_lvl")
+    assert os.path.basename(tp_lvl).startswith("tp_lvl-")
+    assert os.path.basename(_resolved("uart")).startswith("uart_tb-")
+    assert os.path.basename(_resolved("cache_memory")).startswith("bram_over_axi_tb-")
+    fuzz = _resolved("random_mem")
+    assert fuzz != tp_lvl and os.path.basename(fuzz).startswith("tp_lvl-")
+    assert _resolved("random_mem", "FUZZ_PROFILE=traced") == tp_lvl
@@ -0,0 +1,83 @@
+import random
+import shutil
+import pytest
+from tests.CPU import riscv_asm as asm
+from tests.CPU import riscv_tests_gen as gen
+
+EDGE_CONSTANTS = [0, 1, -1, 0x7FF, 0x800, -0x800, -0x801, 0xFFF, 0x1000, 0x7FFFF800, 0x7FFFFFFF,
+                  0x80000000, -0x80000000, -0x80000001, 0xFFFFFFFF, 0x100000000, 0x7FFFFFFFFFFFFFFF,
+                  -0x8000000000000000, 0x123456789ABCDEF0, 0x8000000000000800]
+
+def _sext32(v):
+    return asm.to_signed(v, 32) & asm.MASK
+
+def _li_value(value):
+    """Register value after executing expand_li's sequence."""
+    r = 0
+    for op, _, rs1, imm in asm.expand_li(5, value):
+        src = r if rs1 else 0
+        if op == "lui":
+            r = _sext32(imm << 12)
+        elif op == "addiw":
+            r = _sext32(src + imm)
+        elif op == "addi":
+            r = (src + imm) & asm.MASK
+        else:
+            assert op == "slli"
+            r = (src << imm) & asm.MASK
+    return r
+
+# ---------- encoding ----------
+def test_known_encodings():
+    # spot checks against the binutils encodings
+    raw, mnemonics, _ = asm.assemble("addi x1, x0, 5\nsd x1, -8(x2)\nsraiw x3, x4, 31\nlui x5, 0xfffff\nfence.i\n")
+    assert raw.hex() == "93005000233c11fe9b51f241b7f2ffff0f100000"
+    assert list(mnemonics) == ["addi\tx1,x0,5", "sd\tx1,-8(x2)", "sraiw\tx3,x4,0x1f", "lui\tx5,0xfffff", "fence.i"]
+
+def test_labels():
+    raw, mnemonics, symbols = asm.assemble("start:\nnop\nloop: addi x1, x1, -1\nbne x1, x0, loop\njal x0, end\nend:\necall\n")
+    assert symbols == {"start": 0, "loop": 4, "end": 16}
+    assert list(mnemonics)[2:4] == ["bne\tx1,x0,4 <loop>", "jal\tx0,10 <end>"]
+    numeric, _, _ = asm.assemble("nop\n1: addi x1, x1, -1\nbne x1, x0, 1b\njal x0, 1f\n1:\necall\n")
+    assert numeric == raw
+
+def test_unsupported():
+    for src in ["addi x1, x0, 2048", "slli x1, x1, 64", "mul x1, x2, x3", ".data", "beq x1, x2, nowhere"]:
+        with pytest.raises(asm.UnsupportedAsm):
+            asm.assemble(src)
+
+# ---------- li ----------
+@pytest.mark.parametrize("value", EDGE_CONSTANTS)
+def test_li_edge_constants(value):
+    assert _li_value(value) == value & asm.MASK
+
+def test_li_random_constants():
+    rng = random.Random(0)
+    for _ in range(300):
+        value = rng.getrandbits(rng.choice([12, 20, 32, 33, 44, 64]))
+        value = asm.to_signed(value, 64) if rng.random() < 0.5 else value
+        assert _li_value(value) == value & asm.MASK, hex(value)
+
+@pytest.mark.parametrize("value,seq", [
+    (0x800,      [("lui", 5, 0, 1), ("addiw", 5, 5, -2048)]),
+    (0x7FFFFFFF, [("lui", 5, 0, 0x80000), ("addiw", 5, 5, -1)]),
+    (0x80000000, [("addi", 5, 0, 1), ("slli", 5, 5, 31)]),
+    (-2048,      [("addi", 5, 0, -2048)]),
+    (0x123456789ABCDEF0, [("lui", 5, 0, 583), ("addiw", 5, 5, -1875), ("slli", 5, 5, 14),
+                          ("addi", 5, 5, -947), ("slli", 5, 5, 12), ("addi", 5, 5, 1511),
+                          ("slli", 5, 5, 13), ("addi", 5, 5, -272)]),
+])
+def test_li_matches_gas_sequence(value, seq):
+    assert asm.expand_li(5, value) == seq
+
+def test_li_size_matches_expansion():
+    raw, _, symbols = asm.assemble("li x5, 0x123456789abcdef0\nafter:\necall\n")
+    assert symbols["after"] == 4 * len(asm.expand_li(5, 0x123456789ABCDEF0)) == len(raw) - 4
+
+@pytest.mark.skipif(not shutil.which(gen.AS), reason="needs the RISC-V binutils")
+def test_symbols_match_gnu_path():
+    src = "start:\n.Lloop: addi x1, x1, -1\nbne x1, x0, .Lloop\n1: jal x0, 1f\n1:\nend:\necall\n"
+    raw, _, symbols = asm.assemble(src)
+    gnu = gen._assemble_rv32i_uncached(src)
+    assert gnu.raw == raw
+    assert gnu.symbols == symbols == {"start": 0, "end": 12}
@@ -0,0 +1,51 @@
+import random
+import pytest
+from tests.CPU import riscv_asm as asm
+from tests.CPU.riscv_disasm import decode, disassemble_bytes, disassemble_word
+
+def _operands(op, rng):
+    """Source text for `op` with random operands (no labels)."""
+    rd, rs1, rs2 = (f"x{rng.randrange(32)}" for _ in range(3))
+    imm = rng.randrange(-2048, 2048)
+    if op in asm.R_OPS:
+        return f"{op} {rd}, {rs1}, {rs2}"
+    if op in asm.I_OPS:
+        return f"{op} {rd}, {rs1}, {imm}"
+    if op in asm.SHIFT_OPS:
+        return f"{op} {rd}, {rs1}, {rng.randrange(1 << asm.SHIFT_OPS[op][3])}"
+    if op in asm.LOAD_OPS or op == "jalr":
+        return f"{op} {rd}, {imm}({rs1})"
+    if op in asm.STORE_OPS:
+        return f"{op} {rs2}, {imm}({rs1})"
+    if op in ("lui", "auipc"):
+        return f"{op} {rd}, 0x{rng.randrange(1 << 20):x}"
+    return op
+
+NON_LABEL_OPS = [*asm.R_OPS, *asm.I_OPS, *asm.SHIFT_OPS, *asm.LOAD_OPS, *asm.STORE_OPS,
+                 "jalr", "lui", "auipc", *asm.SYSTEM_OPS]
+
+@pytest.mark.parametrize("op", NON_LABEL_OPS)
+def test_round_trip(op):
+    rng = random.Random(op)
+    for _ in range(50):
+        src = _operands(op, rng)
+        raw, _, _ = asm.assemble(src)
+        word = int.from_bytes(raw, "little")
+        assert decode(word)[0] == op, src
+        text = disassemble_word(word)
+        assert asm.assemble(text)[0] == raw, (src, text)
+
+@pytest.mark.parametrize("op", [*asm.BRANCH_OPS, "jal"])
+def test_round_trip_pc_relative(op):
+    operands = "x3, x4" if op in asm.BRANCH_OPS else "x3"
+    for pad_before, pad_after in [(0, 1), (5, 0), (0, 700), (700, 0)]:
+        src = "nop\n" * pad_before + "target:\n" + "nop\n" * pad_after + f"{op} {operands}, target\n"
+        raw, _, symbols = asm.assemble(src)
+        pc = len(raw) - 4
+        word = int.from_bytes(raw[pc:], "little")
+        assert disassemble_word(word, pc) == f"{op}\t{operands.replace(' ', '')},{symbols['target']:x}"
+
+def test_symbolized_targets_and_unknown_words():
+    raw, _, symbols = asm.assemble("loop:\naddi x1, x1, -1\nbne x1, x0, loop\n")
+    lines = list(disassemble_bytes(raw + b"\xff\xff\xff\xff", 0, symbols))
+    assert lines == ["addi\tx1,x1,-1", "bne\tx1,x0,0 <loop>", ".4byte\t0xffffffff"]
@@ -0,0 +1,106 @@
+import pytest
+from tests.CPU.riscv_asm import assemble
+from tests.CPU.riscv_iss import DECODE_CACHE_SIZE, HANDLERS, MASK, Iss, IssError, decode_op, run_program
+
+NEG = -0x123456789 & MASK   # 0xfffffffedcba9877
+
+def _run(src, mem_size=4096):
+    raw, _, _ = assemble(src + "\necall\n")
+    return run_program(raw, mem_size)
+
+PROLOGUE = "li x1, -0x123456789\nli x2, 5\n"
+P = len(assemble(PROLOGUE)[0])   # address of the first instruction under test
+
+# op -> (program, {register: expected value}); PROLOGUE sets x1 = NEG and x2 = 5 first
+CASES = {
+    "add":   ("add x3, x1, x2", {3: (NEG + 5) & MASK}),
+    "sub":   ("sub x3, x2, x1", {3: (5 - NEG) & MASK}),
+    "sll":   ("li x4, 68\nsll x3, x2, x4", {3: 5 << 4}),          # shift amount mod 64
+    "srl":   ("srl x3, x1, x2", {3: NEG >> 5}),
+    "sra":   ("sra x3, x1, x2", {3: (NEG >> 5) | (0x1F << 59)}),
+    "slt":   ("slt x3, x1, x2\nslt x4, x2, x1", {3: 1, 4: 0}),
+    "sltu":  ("sltu x3, x1, x2\nsltu x4, x2, x1", {3: 0, 4: 1}),
+    "xor":   ("xor x3, x1, x2", {3: NEG ^ 5}),
+    "or":    ("or x3, x1, x2", {3: NEG | 5}),
+    "and":   ("and x3, x1, x2", {3: NEG & 5}),
+    "addw":  ("li x4, 0x7fffffff\naddw x3, x4, x2", {3: 0xFFFFFFFF80000004}),
+    "subw":  ("subw x3, x0, x2", {3: -5 & MASK}),
+    "sllw":  ("li x4, 33\nsllw x3, x1, x4", {3: 0xFFFFFFFFB97530EE}),   # shift amount mod 32
+    "srlw":  ("srlw x3, x1, x2", {3: 0xDCBA9877 >> 5}),
+    "sraw":  ("sraw x3, x1, x2", {3: (0xDCBA9877 >> 5) | 0xFFFFFFFFF8000000}),
+    "addi":  ("addi x3, x2, -6", {3: MASK}),
+    "slti":  ("slti x3, x1, 0\nslti x4, x2, 5", {3: 1, 4: 0}),
+    "sltiu": ("sltiu x3, x2, -1\nsltiu x4, x1, 5", {3: 1, 4: 0}),      # -1 compares as 2^64-1
+    "xori":  ("xori x3, x1, -1", {3: ~NEG & MASK}),
+    "ori":   ("ori x3, x2, 0x7f0", {3: 0x7F5}),
+    "andi":  ("andi x3, x1, -16", {3: NEG & ~15 & MASK}),
+    "addiw": ("addiw x3, x1, 0", {3: 0xFFFFFFFFDCBA9877}),
+    "slli":  ("slli x3, x2, 63", {3: 1 << 63}),
+    "srli":  ("srli x3, x1, 60", {3: 0xF}),
+    "srai":  ("srai x3, x1, 60", {3: MASK}),
+    "slliw": ("slliw x3, x2, 31", {3: 0xFFFFFFFF80000000}),
+    "srliw": ("srliw x3, x1, 28", {3: 0xD}),
+    "sraiw": ("sraiw x3, x1, 28", {3: -3 & MASK}),
+    "lb":    ("sd x1, 0x100(x0)\nlb x3, 0x100(x0)\nlb x4, 0x103(x0)", {3: 0x77, 4: -0x24 & MASK}),
+    "lh":    ("sd x1, 0x100(x0)\nlh x3, 0x100(x0)", {3: 0xFFFFFFFFFFFF9877}),
+    "lw":    ("sd x1, 0x100(x0)\nlw x3, 0x100(x0)", {3: 0xFFFFFFFFDCBA9877}),
+    "ld":    ("sd x1, 0x100(x0)\nld x3, 0x100(x0)", {3: NEG}),
+    "lbu":   ("sd x1, 0x100(x0)\nlbu x3, 0x103(x0)", {3: 0xDC}),
+    "lhu":   ("sd x1, 0x100(x0)\nlhu x3, 0x100(x0)", {3: 0x9877}),
+    "lwu":   ("sd x1, 0x100(x0)\nlwu x3, 0x100(x0)", {3: 0xDCBA9877}),
+    "sb":    ("sd x0, 0x100(x0)\nsb x1, 0x101(x0)\nld x3, 0x100(x0)", {3: 0x7700}),
+    "sh":    ("sd x0, 0x100(x0)\nsh x1, 0x102(x0)\nld x3, 0x100(x0)", {3: 0x98770000}),
+    "sw":    ("sd x0, 0x100(x0)\nsw x1, 0x104(x0)\nld x3, 0x100(x0)", {3: 0xDCBA9877 << 32}),
+    "sd":    ("li x4, 0x200\nsd x1, -8(x4)\nld x3, 0x1f8(x0)", {3: NEG}),
+    "beq":   ("beq x2, x2, 1f\nli x3, 1\n1: beq x1, x2, 2f\nli x4, 1\n2:", {3: 0, 4: 1}),
+    "bne":   ("bne x1, x2, 1f\nli x3, 1\n1: bne x2, x2, 2f\nli x4, 1\n2:", {3: 0, 4: 1}),
+    "blt":   ("blt x1, x2, 1f\nli x3, 1\n1: blt x2, x1, 2f\nli x4, 1\n2:", {3: 0, 4: 1}),
+    "bge":   ("bge x2, x1, 1f\nli x3, 1\n1: bge x1, x2, 2f\nli x4, 1\n2:", {3: 0, 4: 1}),
+    "bltu":  ("bltu x2, x1, 1f\nli x3, 1\n1: bltu x1, x2, 2f\nli x4, 1\n2:", {3: 0, 4: 1}),
+    "bgeu":  ("bgeu x1, x2, 1f\nli x3, 1\n1: bgeu x2, x1, 2f\nli x4, 1\n2:", {3: 0, 4: 1}),
+    "jal":   ("jal x3, 1f\nli x4, 1\n1: jal x0, 2f\n2:", {3: P + 4, 4: 0}),
+    "jalr":  ("auipc x5, 0\njalr x3, 13(x5)\nli x4, 1", {3: P + 8, 4: 0}),        # bit 0 of the target cleared
+    "lui":   ("lui x3, 0x80000", {3: 0xFFFFFFFF80000000}),
+    "auipc": ("auipc x3, 1", {3: P + 0x1000}),
+    "fence.i": ("fence.i", {}),
+    "ebreak": ("ebreak\nli x3, 1", {3: 0}),
+    "ecall":  ("ecall\nli x3, 1", {3: 0}),
+}
+
+def test_every_handler_has_a_case():
+    assert set(HANDLERS) - {"fence"} == set(CASES)
+
+@pytest.mark.parametrize("op", sorted(CASES))
+def test_semantics(op):
+    src, expect = CASES[op]
+    r = _run(PROLOGUE + src)
+    assert r.halted
+    assert r.x[1] == NEG and r.x[2] == 5
+    for reg, value in expect.items():
+        assert r.x[reg] == value, f"{op}: x{reg} = 0x{r.x[reg]:x}"
+
+def test_x0_stays_zero():
+    r = _run("addi x0, x0, 1\nlui x0, 1\njal x0, 1f\n1:")
+    assert r.x[0] == 0
+
+def test_step_matches_run():
+    raw, _, _ = assemble(PROLOGUE + "1: addi x2, x2, -1\nbne x2, x0, 1b\necall\n")
+    stepped = Iss(raw)
+    while not stepped.halted:
+        stepped.step()
+    assert stepped.result() == Iss(raw).run()
+
+def test_errors():
+    with pytest.raises(IssError, match="outside memory"):
+        _run("lui x1, 1\nld x2, 0(x1)", mem_size=4096)
+    with pytest.raises(IssError, match="illegal instruction"):
+        run_program(b"\xff\xff\xff\xff")
+    with pytest.raises(IssError, match="fetch"):
+        _run("li x1, 2\njalr x0, 0(x1)")
+    with pytest.raises(IssError, match="no ecall"):
+        run_program(assemble("1: jal x0, 1b")[0], max_steps=100)
+
+def test_decode_cache_is_bounded():
+    for k in range(DECODE_CACHE_SIZE + 100):
+        decode_op(0x13 | (k & 31) << 7 | (k >> 5) << 20)   # addi x<k % 32>, x0, k // 32
+    assert decode_op.cache_info().currsize <= DECODE_CACHE_SIZE